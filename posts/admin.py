@@ -1,13 +1,113 @@
 from django.contrib import admin
+from django.core.paginator import EmptyPage
+from django.db.models import Q
+from django.utils.functional import cached_property
 
-from .models import Comment, Follow, Group, Post
+from .counts import approximate_count
+from .models import Comment, Follow, Group, Post, User
+from .pagination import ApproximatePaginator
+from .search import filter_matching, match_expression
 
 
-class PostAdmin(admin.ModelAdmin):
+class ChangeListPaginator(ApproximatePaginator):
+    """ApproximatePaginator, чьё число строк не меньше видимых строк.
+
+    Оценка может отставать: старая статистика ANALYZE или число из кэша
+    до массового импорта. Если оценка меньше exact_limit, число строк
+    досчитывается запросом с LIMIT, иначе заниженное число включило бы
+    «показать все» и выборку всей таблицы без LIMIT. Страница за
+    пределами оценки открывается, если на ней есть строки.
+    Сиротские строки (orphans) админка не использует.
+    """
+    exact_limit = None
+
+    @cached_property
+    def count(self):
+        estimate = approximate_count(self.object_list)
+        if self.exact_limit is None or estimate >= self.exact_limit:
+            return estimate
+        return self.object_list[:self.exact_limit].count()
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            number = int(number)
+            bottom = (number - 1) * self.per_page
+            if number < 1 or not self.object_list[bottom:].exists():
+                raise
+        self.count = bottom + 1
+        self.__dict__.pop('num_pages', None)
+        return number
+
+    def page(self, number):
+        # Срез не обрезается по count: последняя видимая страница
+        # показывается целиком, даже если число строк занижено.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список для таблиц на десятки миллионов строк.
+
+    Число строк берётся из approximate_count, а общий COUNT(*) без
+    фильтров не выполняется. Связанные объекты в списке подтягиваются
+    JOIN-ом (list_select_related), а в форме выбираются автодополнением
+    или по id вместо выпадающего списка на всю таблицу.
+    """
+    paginator = ChangeListPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        paginator = super().get_paginator(request, queryset, per_page,
+                                          orphans, allow_empty_first_page)
+        # На одну строку больше, чем «показать все»: такое число уже
+        # выключает эту кнопку и включает постраничный вывод.
+        paginator.exact_limit = max(self.list_max_show_all,
+                                    self.list_per_page) + 1
+        return paginator
+
+
+class UsernameSearchMixin:
+    """Поиск по точному имени пользователя в полях username_fields.
+
+    Обычный поиск админки строит LIKE по каждому полю из search_fields,
+    и SQLite читает всю таблицу. Здесь имя сравнивается на равенство по
+    уникальному индексу, а строки выбираются по индексам внешних ключей.
+    """
+    username_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        username = search_term.strip()
+        if not username:
+            return queryset, False
+        users = User.objects.filter(username=username).values('pk')
+        condition = Q()
+        for field in self.username_fields:
+            condition |= Q(**{f'{field}__in': users})
+        return queryset.filter(condition), False
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author')
+    list_select_related = ('author',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%…%' по всей таблице ищем по индексу FTS5. Запрос
+        # без единого слова индекс не найдёт, и полный обход не нужен.
+        if not search_term.strip():
+            return queryset, False
+        if not match_expression(search_term):
+            return queryset.none(), False
+        return filter_matching(queryset, search_term), False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -17,18 +117,23 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(UsernameSearchMixin, LargeTableAdmin):
     list_display = ('pk', 'text', 'created', 'author', 'post')
-    search_fields = ('text',)
+    list_select_related = ('author', 'post')
+    search_fields = ('author__username',)
+    username_fields = ('author',)
     list_filter = ('created',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'created'
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post',)
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(UsernameSearchMixin, LargeTableAdmin):
     list_display = ('pk', 'author', 'user')
-    search_fields = ('pk',)
-    list_filter = ('author',)
-    empty_value_display = '-пусто-'
+    list_select_related = ('author', 'user')
+    search_fields = ('author__username', 'user__username')
+    username_fields = ('author', 'user')
+    autocomplete_fields = ('author', 'user')
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,172 @@
+"""JSON API только для чтения: ленты, группы, профили и комментарии.
+
+Списки листаются курсором (параметры ``cursor`` и ``limit``), связанные
+объекты подтягиваются select_related. Ленты отдают ETag из версий
+областей кэша, и неизменившаяся лента отвечает 304 без выборки записей
+и сериализации.
+"""
+from functools import wraps
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_safe
+
+from .cache import FEED_SCOPE, author_scope, group_scope, post_scope
+from .conditional import follow_feed_etag, scoped_etag
+from .feeds import feed_queryset
+from .models import Group, Post, User
+from .pagination import CURSOR_PARAM, POSTS_PER_PAGE, CursorPaginator
+from .stats import author_stats
+from .timeline import FEED_DATE, FEED_PK, feed_for
+
+MAX_LIMIT = 100
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def api_login_required(view_func):
+    """Вместо редиректа на страницу входа отвечает 401."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return json_response({'detail': 'Требуется авторизация.'},
+                                 status=401)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _file_url(file):
+    return file.url if file else None
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'updated': post.updated.isoformat(),
+        'author': post.author.username,
+        'group': ({'slug': post.group.slug, 'title': post.group.title}
+                  if post.group_id else None),
+        'image': _file_url(post.image),
+        'image_webp': _file_url(post.image_webp),
+        'comment_count': post.comment_count,
+        'url': reverse('post', args=[post.author.username, post.pk]),
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'author': comment.author.username,
+    }
+
+
+def serialize_group(group):
+    return {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        return POSTS_PER_PAGE
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _page_link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params[CURSOR_PARAM] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def paginated(request, queryset, serialize, ordering_field='pub_date',
+              pk_field='pk'):
+    paginator = CursorPaginator(queryset, _limit(request), ordering_field,
+                                pk_field)
+    page = paginator.get_page(request.GET.get(CURSOR_PARAM))
+    return json_response({
+        'results': [serialize(obj) for obj in page],
+        'next': _page_link(request, page.next_cursor()),
+        'previous': _page_link(request, page.previous_cursor()),
+    })
+
+
+@require_safe
+@condition(etag_func=scoped_etag(FEED_SCOPE))
+def posts(request):
+    return paginated(request, feed_queryset(), serialize_post)
+
+
+@require_safe
+@condition(etag_func=scoped_etag(post_scope('{post_id}')))
+def post_detail(request, post_id):
+    post = get_object_or_404(feed_queryset(), pk=post_id)
+    return json_response(serialize_post(post))
+
+
+@require_safe
+@condition(etag_func=scoped_etag(post_scope('{post_id}')))
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    comments = post.comments.select_related('author')
+    return paginated(request, comments, serialize_comment, 'created')
+
+
+@require_safe
+def groups(request):
+    return json_response({
+        'results': [serialize_group(group)
+                    for group in Group.objects.order_by('title')],
+    })
+
+
+@require_safe
+@condition(etag_func=scoped_etag(group_scope('{slug}')))
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return paginated(request, feed_queryset(group.posts.all()),
+                     serialize_post)
+
+
+@require_safe
+@condition(etag_func=scoped_etag(author_scope('{username}')))
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    stats = author_stats(author.pk)
+    return json_response({
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts': stats.posts,
+        'followers': stats.followers,
+        'following': stats.following,
+        'url': reverse('profile', args=[author.username]),
+    })
+
+
+@require_safe
+@condition(etag_func=scoped_etag(author_scope('{username}')))
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return paginated(request, feed_queryset(author.posts.all()),
+                     serialize_post)
+
+
+@require_safe
+@api_login_required
+@condition(etag_func=follow_feed_etag)
+def follow_feed(request):
+    return paginated(request, feed_queryset(feed_for(request.user)),
+                     serialize_post, FEED_DATE, FEED_PK)
@@ -0,0 +1,142 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Ключ страницы включает версии «областей», от которых она зависит
+(вся лента, группа, автор, запись). Сигналы на Post, Comment, Follow и
+Group увеличивают версии затронутых областей, поэтому старые копии
+просто перестают читаться, а изменения видны сразу. Страница для
+кэша строится по основной базе: реплика может ещё не получить запись,
+которая увеличила версию, и тогда устаревшая страница осталась бы под
+новым ключом до истечения PAGE_CACHE_TIMEOUT.
+"""
+import hashlib
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from yatube import db_router
+
+FEED_SCOPE = 'posts'
+HITS_KEY = 'pagecache:hits'
+MISSES_KEY = 'pagecache:misses'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def _version_key(scope):
+    return f'pagecache:version:{scope}'
+
+
+def _initial_version():
+    # Версия, созданная заново после вытеснения, не должна совпасть ни с
+    # одной из прежних, иначе снова начнут читаться устаревшие страницы.
+    return time.time_ns() // 1000
+
+
+def get_version(scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(scopes):
+    """Версии нескольких областей одним обращением к кэшу."""
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    return [found[key] if key in found else get_version(scope)
+            for key, scope in zip(keys, scopes)]
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+
+
+def _count(key):
+    # Считается лишь доля PAGE_CACHE_STATS_SAMPLE_RATE обращений: каждый
+    # incr в SQLiteCache — пишущая транзакция, и на каждом попадании она
+    # стоила бы дороже самого чтения страницы.
+    rate = settings.PAGE_CACHE_STATS_SAMPLE_RATE
+    if not rate or random.random() >= rate:
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats():
+    """Попадания и промахи, пересчитанные из выборки."""
+    rate = settings.PAGE_CACHE_STATS_SAMPLE_RATE
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = (round(counts.get(key, 0) / rate) if rate else 0
+                    for key in (HITS_KEY, MISSES_KEY))
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def _page_key(request, scopes):
+    versions = ':'.join(str(get_version(scope)) for scope in scopes)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pagecache:page:{path}:{versions}'
+
+
+def _cacheable(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def anonymous_page_cache(*scope_templates):
+    """Кэширует ответ view для анонимных GET-запросов.
+
+    Каждый шаблон области форматируется аргументами view, например
+    ``'group:{slug}'`` для ``group_posts(request, slug)``.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or
+                    request.user.is_authenticated):
+                return view_func(request, *args, **kwargs)
+            scopes = [template.format(**kwargs)
+                      for template in scope_templates]
+            key = _page_key(request, scopes)
+            response = cache.get(key)
+            if response is not None:
+                _count(HITS_KEY)
+                return response
+            _count(MISSES_KEY)
+            with db_router.primary():
+                response = view_func(request, *args, **kwargs)
+            if _cacheable(response):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,46 @@
+"""Валидаторы для условных GET-запросов.
+
+ETag строится из версий областей кэша страниц (см. posts.cache):
+сигналы увеличивают их при любом изменении записей, комментариев и
+подписок, поэтому проверка стоит одного обращения к кэшу и не
+требует рендера. Last-Modified страницы не отдают: дата самой
+свежей записи не меняется при удалении, подписке или смене
+пользователя, а Django отвечает 304 на запрос с одним
+If-Modified-Since, не глядя на ETag.
+"""
+import hashlib
+
+from .cache import author_scope, get_versions
+from .models import Follow
+
+
+def _etag(request, scopes):
+    versions = ':'.join(str(version) for version in get_versions(scopes))
+    raw = f'{request.get_full_path()}|{request.user.pk}|{versions}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def scoped_etag(*scope_templates):
+    """Функция ETag для django.views.decorators.http.condition.
+
+    Шаблоны областей форматируются аргументами view и именем текущего
+    пользователя ``viewer``, например ``'author:{viewer}'``.
+    """
+    def etag(request, *args, **kwargs):
+        return _etag(request, [
+            template.format(viewer=request.user.get_username(), **kwargs)
+            for template in scope_templates])
+    return etag
+
+
+def follow_feed_etag(request):
+    """ETag ленты подписок читателя.
+
+    Область читателя меняется при его подписках и отписках, а области
+    авторов — при их записях и комментариях к ним, поэтому чужие
+    записи на сайте ETag ленты не сбрасывают.
+    """
+    usernames = Follow.objects.filter(user=request.user).values_list(
+        'author__username', flat=True)
+    return _etag(request, [author_scope(request.user.get_username()),
+                           *map(author_scope, usernames)])
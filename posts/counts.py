@@ -0,0 +1,102 @@
+"""Приблизительное число строк queryset для нумерованных паджинаторов.
+
+COUNT(*) по большой ленте читает весь индекс на каждом запросе, хотя
+для номеров страниц точность до записи не нужна. approximate_count
+хранит число в кэше по тексту SQL и отдаёт его, пока оно свежее
+COUNT_CACHE_TTL секунд. Устаревшее число тоже отдаётся сразу, а
+пересчёт уходит в фоновый поток (stale-while-revalidate). Если числа
+ещё нет, для таблицы без условий берётся оценка из sqlite_stat1
+(её собирает ANALYZE, см. sqlite_maintenance), иначе один раз считается
+точный COUNT.
+"""
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд держать флаг «пересчёт уже в очереди».
+REFRESH_LOCK_TIMEOUT = 60
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1)
+    return _executor
+
+
+def _key(queryset):
+    # Сортировка на число строк не влияет и в ключ не входит.
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{queryset.db}:{sql}:{params}'.encode())
+    return f'count:{digest.hexdigest()}'
+
+
+def table_estimate(queryset):
+    """Оценка числа строк таблицы из sqlite_stat1 или None."""
+    query = queryset.query
+    connection = connections[queryset.db]
+    if query.where or query.distinct or connection.vendor != 'sqlite':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # Таблицы sqlite_stat1 нет, пока не выполнен ANALYZE.
+        return None
+    return int(row[0].split()[0]) if row else None
+
+
+def refresh(queryset):
+    """Считает точное число строк и кладёт его в кэш."""
+    key = _key(queryset)
+    count = queryset.count()
+    cache.set(key, (count, time.time() + settings.COUNT_CACHE_TTL), None)
+    cache.delete(f'{key}:refreshing')
+    return count
+
+
+def _refresh_in_thread(queryset):
+    try:
+        refresh(queryset)
+    except Exception:
+        logger.exception('Не удалось пересчитать число строк')
+    finally:
+        connections.close_all()
+
+
+def approximate_count(queryset):
+    """Число строк queryset: из кэша, из статистики SQLite или COUNT."""
+    queryset = queryset.order_by()
+    try:
+        key = _key(queryset)
+    except EmptyResultSet:
+        # Условие заведомо ложно (например, queryset.none()): SQL нет.
+        return 0
+    cached = cache.get(key)
+    if cached is None:
+        estimate = table_estimate(queryset)
+        if estimate is None:
+            return refresh(queryset)
+        cached = (estimate, time.time() + settings.COUNT_CACHE_TTL)
+        cache.set(key, cached, None)
+    count, fresh_until = cached
+    if fresh_until > time.time():
+        return count
+    if not cache.add(f'{key}:refreshing', True, REFRESH_LOCK_TIMEOUT):
+        return count
+    if not settings.COUNT_REFRESH_ASYNC:
+        return refresh(queryset)
+    get_executor().submit(_refresh_in_thread, queryset)
+    return count
@@ -0,0 +1,23 @@
+"""Общий queryset записей для лент, поиска и JSON API.
+
+Карточке записи нужны автор и группа, поэтому они подтягиваются одним
+JOIN через select_related, а only() оставляет в выборке лишь колонки,
+которые читают шаблон post_card.html и serialize_post: хэш пароля и
+остальные поля пользователя не передаются из базы вовсе. Число
+комментариев берётся из денормализованного Post.comment_count, а не
+из аннотации Count, которая добавила бы JOIN с GROUP BY по комментариям.
+"""
+from .models import Post
+
+CARD_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'comment_count', 'image',
+    'image_webp', 'author', 'author__username', 'group', 'group__slug',
+    'group__title',
+)
+
+
+def feed_queryset(posts=None):
+    """Записи (по умолчанию все) с автором и группой для карточек."""
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.select_related('author', 'group').only(*CARD_FIELDS)
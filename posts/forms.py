@@ -1,5 +1,7 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm, Textarea
 
+from . import images
 from .models import Comment, Post
 
 
@@ -9,6 +11,27 @@ class PostForm(ModelForm):
         model = Post
         fields = ['group', 'text', 'image']
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # При редактировании без новой загрузки здесь лежит уже
+        # сохранённый FieldFile: его нормализовали раньше.
+        if not isinstance(image, UploadedFile):
+            return image
+        self.normalized_image = images.normalize(image)
+        return self.normalized_image.file
+
+    def save(self, commit=True):
+        normalized = getattr(self, 'normalized_image', None)
+        if normalized is not None:
+            if normalized.webp is not None:
+                self.instance.image_webp.save(normalized.webp.name,
+                                              normalized.webp, save=False)
+            else:
+                # WebP от прежнего изображения к новому не подходит.
+                self.instance.image_webp = None
+            images.record(normalized)
+        return super().save(commit=commit)
+
 
 class CommentForm(ModelForm):
 
@@ -0,0 +1,201 @@
+"""Нормализация изображений, загружаемых с записями.
+
+Фотографии с телефонов весят десятки мегабайт, и каждый проход
+sorl-thumbnail декодирует их заново. Перед сохранением изображение
+проверяется по размеру файла и числу пикселей, уменьшается до
+IMAGE_MAX_DIMENSION по длинной стороне и перекодируется без EXIF.
+Рядом сохраняется вариант в WebP. Большие загрузки Django уже держит
+во временном файле (FILE_UPLOAD_MAX_MEMORY_SIZE), и результат
+перекодирования тоже пишется на диск, а не в память.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import (InMemoryUploadedFile,
+                                            TemporaryUploadedFile)
+from PIL import Image, ImageOps
+
+BYTES_IN_KEY = 'uploads:bytes_in'
+BYTES_OUT_KEY = 'uploads:bytes_out'
+WEBP_BYTES_KEY = 'uploads:webp_bytes'
+COUNT_KEY = 'uploads:count'
+
+CONTENT_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+
+
+class NormalizedImage:
+    """Результат обработки: основной файл, WebP-вариант и размеры."""
+
+    def __init__(self, file, webp, original_size):
+        self.file = file
+        self.webp = webp
+        self.original_size = original_size
+
+    @property
+    def bytes_saved(self):
+        return self.original_size - self.file.size
+
+
+def check_limits(upload):
+    """Отклоняет слишком тяжёлые файлы и слишком большие растры.
+
+    Число пикселей берётся из заголовка, без декодирования картинки.
+    """
+    limit = settings.IMAGE_UPLOAD_MAX_SIZE
+    if upload.size > limit:
+        raise ValidationError(
+            f'Файл больше {limit // (1024 * 1024)} МБ.', code='file_size')
+    width, height = upload.image.size
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            f'Изображение {width}×{height} слишком большое.',
+            code='pixels')
+
+
+def _has_metadata(image):
+    return bool(image.info.get('exif') or image.info.get('xmp') or
+                image.getexif())
+
+
+def _target_format(image):
+    # Форматы вроде TIFF и BMP храним как PNG или JPEG.
+    if image.format in EXTENSIONS:
+        return image.format
+    return 'PNG' if 'A' in image.getbands() else 'JPEG'
+
+
+def _save_options(target):
+    if target == 'JPEG':
+        return {'quality': settings.IMAGE_JPEG_QUALITY, 'optimize': True,
+                'progressive': True}
+    if target == 'PNG':
+        return {'optimize': True}
+    if target == 'WEBP':
+        return {'quality': settings.IMAGE_WEBP_QUALITY, 'method': 4}
+    return {}
+
+
+def _prepare(image, target):
+    if target == 'JPEG' and image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
+    if target == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'A' in image.getbands() or
+                             'transparency' in image.info else 'RGB')
+    return image
+
+
+def _output_file(upload, name, content_type):
+    """Файл для результата: на диске, если и загрузка была на диске."""
+    if isinstance(upload, TemporaryUploadedFile):
+        return TemporaryUploadedFile(name, content_type, 0, None)
+    return InMemoryUploadedFile(io.BytesIO(), 'image', name, content_type,
+                                0, None)
+
+
+def _encode(image, upload, name, target, icc_profile):
+    output = _output_file(upload, name, CONTENT_TYPES[target])
+    options = _save_options(target)
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    _prepare(image, target).save(output.file, target, **options)
+    output.size = output.file.tell()
+    output.file.seek(0)
+    return output
+
+
+def _webp_variant(image, name, icc_profile):
+    buffer = io.BytesIO()
+    options = _save_options('WEBP')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    _prepare(image, 'WEBP').save(buffer, 'WEBP', **options)
+    return ContentFile(buffer.getvalue(),
+                       name=os.path.splitext(name)[0] + '.webp')
+
+
+def normalize(upload):
+    """Проверяет и нормализует загруженный файл ImageField формы.
+
+    Исходный файл остаётся как есть, если его не нужно уменьшать, в нём
+    нет метаданных, и перекодирование не сделало бы его меньше.
+    Анимированные изображения только проверяются.
+    """
+    check_limits(upload)
+    upload.seek(0)
+    image = Image.open(upload)
+    if getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return NormalizedImage(upload, None, upload.size)
+    max_dimension = settings.IMAGE_MAX_DIMENSION
+    # JPEG умеет декодироваться сразу в уменьшенном масштабе.
+    image.draft('RGB', (max_dimension, max_dimension))
+    source_format = image.format
+    has_metadata = _has_metadata(image)
+    icc_profile = image.info.get('icc_profile')
+    target = _target_format(image)
+    # Поворот из EXIF применяем к пикселям: сам EXIF не сохраняется.
+    image = ImageOps.exif_transpose(image)
+    resized = max(image.size) > max_dimension
+    if resized:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    name = os.path.splitext(upload.name)[0] + EXTENSIONS[target]
+    encoded = _encode(image, upload, name, target, icc_profile)
+    keep_original = (not resized and not has_metadata and
+                     target == source_format and
+                     encoded.size >= upload.size)
+    if keep_original:
+        encoded.close()
+        upload.seek(0)
+        encoded = upload
+    return NormalizedImage(encoded, _webp_variant(image, name, icc_profile),
+                           upload.size)
+
+
+def _add(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def record(normalized):
+    """Копит счётчики сэкономленных байт для image_stats."""
+    _add(COUNT_KEY, 1)
+    _add(BYTES_IN_KEY, normalized.original_size)
+    _add(BYTES_OUT_KEY, normalized.file.size)
+    if normalized.webp is not None:
+        _add(WEBP_BYTES_KEY, normalized.webp.size)
+
+
+def stats():
+    bytes_in = cache.get(BYTES_IN_KEY, 0)
+    bytes_out = cache.get(BYTES_OUT_KEY, 0)
+    return {
+        'uploads': cache.get(COUNT_KEY, 0),
+        'bytes_in': bytes_in,
+        'bytes_out': bytes_out,
+        'webp_bytes': cache.get(WEBP_BYTES_KEY, 0),
+        'bytes_saved': bytes_in - bytes_out,
+        'saved_ratio': 1 - bytes_out / bytes_in if bytes_in else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([COUNT_KEY, BYTES_IN_KEY, BYTES_OUT_KEY,
+                       WEBP_BYTES_KEY])
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'yatube.sqlite_cache.SQLiteCache',
+}
+
+
+def make_backend(name, directory):
+    location = {
+        'locmem': 'bench',
+        'filebased': os.path.join(directory, 'filebased'),
+        'sqlite': os.path.join(directory, 'cache.sqlite3'),
+    }[name]
+    return import_string(BACKENDS[name])(location, {
+        'OPTIONS': {'MAX_ENTRIES': 1000000}})
+
+
+def ops_per_second(operation, keys):
+    started = time.perf_counter()
+    for key in keys:
+        operation(key)
+    return len(keys) / (time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность кэш-бэкендов: LocMemCache, '
+            'FileBasedCache и общего SQLiteCache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=5000)
+        parser.add_argument('--value-size', type=int, default=2048,
+                            help='Размер значения в байтах.')
+        parser.add_argument('--backends', nargs='+', choices=BACKENDS,
+                            default=list(BACKENDS))
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        keys = [f'bench:{number}' for number in range(options['operations'])]
+        value = 'x' * options['value_size']
+        directory = tempfile.mkdtemp()
+        results = {}
+        try:
+            for name in options['backends']:
+                backend = make_backend(name, directory)
+                backend.clear()
+                backend.set('bench:counter', 0, None)
+                results[name] = {
+                    'set': ops_per_second(
+                        lambda key: backend.set(key, value), keys),
+                    'get': ops_per_second(backend.get, keys),
+                    'incr': ops_per_second(
+                        lambda key: backend.incr('bench:counter'), keys),
+                    'add': ops_per_second(
+                        lambda key: backend.add(key + ':new', value), keys),
+                }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'backend':<10}" + ''.join(
+            f'{operation:>12}' for operation in ('set', 'get', 'incr', 'add')))
+        for name, result in results.items():
+            self.stdout.write(f'{name:<10}' + ''.join(
+                f'{result[operation]:>12.0f}'
+                for operation in ('set', 'get', 'incr', 'add')))
+        self.stdout.write('(операций в секунду)')
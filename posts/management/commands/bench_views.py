@@ -0,0 +1,106 @@
+import json
+import math
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет view из posts.urls через тестовый клиент и выводит '
+            'p50/p95/p99 задержки и число SQL-запросов в формате JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на каждый view.')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Запросы без авторизации (через кэш '
+                                 'страниц).')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument('--deep-page', type=int, default=50,
+                            help='Номер «глубокой» страницы главной.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    def targets(self, reader):
+        """Имена view и функции, возвращающие случайный URL для них."""
+        groups = list(Group.objects.values_list('slug', flat=True)[:1000])
+        posts = list(Post.objects.values_list('author__username', 'pk')[:1000])
+        if not posts:
+            raise CommandError('В базе нет записей: запустите seed_data.')
+        choice = self.random.choice
+        targets = {
+            'index': lambda: reverse('index'),
+            'index_deep': lambda: (reverse('index') +
+                                   f'?page={self.options["deep_page"]}'),
+            'profile': lambda: reverse('profile', args=[choice(posts)[0]]),
+            'post': lambda: reverse('post', args=list(choice(posts))),
+        }
+        if groups:
+            targets['group'] = lambda: reverse('group', args=[choice(groups)])
+        if reader is not None:
+            targets['follow_index'] = lambda: reverse('follow_index')
+        return targets
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        client = Client()
+        reader = None
+        if not options['anonymous']:
+            follow = Follow.objects.select_related('user').order_by(
+                '?').first()
+            if follow is not None:
+                reader = follow.user
+                client.force_login(reader)
+        report = {
+            'started': timezone.now().isoformat(),
+            'requests_per_view': options['requests'],
+            'anonymous': options['anonymous'],
+            'cold': options['cold'],
+            'views': {},
+        }
+        for name, make_url in self.targets(reader).items():
+            latencies = []
+            queries = []
+            for _ in range(options['requests']):
+                if options['cold']:
+                    cache.clear()
+                url = make_url()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url} ответил {response.status_code}')
+                queries.append(len(captured))
+            report['views'][name] = {
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'mean_ms': round(statistics.mean(latencies), 2),
+                'queries_mean': round(statistics.mean(queries), 1),
+                'queries_max': max(queries),
+            }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import Comment, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает записи автора или группы (с комментариями) '
+            'в JSONL или CSV, с --images — zip-архивом с изображениями.')
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--author', help='Имя пользователя.')
+        target.add_argument('--group', help='slug группы.')
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default='jsonl')
+        parser.add_argument('--comments', action='store_true',
+                            help='Добавить комментарии к записям автора '
+                                 '(для группы добавляются всегда).')
+        parser.add_argument('--images', action='store_true',
+                            help='Выгрузить zip-архив с изображениями.')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        if not options['author'] and not options['group']:
+            raise CommandError('Укажите --author или --group.')
+        if options['author']:
+            if not User.objects.filter(username=options['author']).exists():
+                raise CommandError(f'Нет пользователя {options["author"]}')
+            posts = Post.objects.filter(author__username=options['author'])
+            comments = (Comment.objects.filter(post__in=posts)
+                        if options['comments'] else None)
+        else:
+            if not Group.objects.filter(slug=options['group']).exists():
+                raise CommandError(f'Нет группы {options["group"]}')
+            posts = Post.objects.filter(group__slug=options['group'])
+            comments = Comment.objects.filter(post__in=posts)
+        if options['images'] and not options['output']:
+            raise CommandError('Архив с изображениями пишется только в '
+                               'файл: укажите --output.')
+        content, _, _ = export.stream(posts, options['format'], comments,
+                                      options['images'])
+        if options['output']:
+            with open(options['output'], 'wb') as file:
+                for chunk in content:
+                    file.write(chunk)
+            return
+        for chunk in content:
+            self.stdout.write(chunk.decode(), ending='')
@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт миниатюры всех размеров, используемых в шаблонах, '
+            'для уже загруженных изображений записей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.THUMBNAIL_WORKERS,
+                            help='Число процессов; 0 — в текущем процессе.')
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='').exclude(image__isnull=True)
+                 .order_by().values_list('image', flat=True).distinct())
+        started = time.perf_counter()
+        done = failed = 0
+        if options['workers'] == 0:
+            for name in names.iterator():
+                thumbnails.generate(name)
+                done += 1
+        else:
+            executor = thumbnails.get_executor(options['workers'])
+            futures = [executor.submit(thumbnails.generate_in_worker, name)
+                       for name in names.iterator()]
+            for future in as_completed(futures):
+                if future.exception() is None:
+                    done += 1
+                else:
+                    failed += 1
+                    self.stderr.write(str(future.exception()))
+            executor.shutdown()
+        self.stdout.write(
+            f'Обработано изображений: {done}, ошибок: {failed}, '
+            f'за {time.perf_counter() - started:.1f} с')
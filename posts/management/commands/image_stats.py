@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import images
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько байт сэкономила нормализация загрузок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счётчики после вывода.')
+
+    def handle(self, *args, **options):
+        stats = images.stats()
+        self.stdout.write(
+            f"Загрузок: {stats['uploads']}, получено: {stats['bytes_in']} Б, "
+            f"сохранено: {stats['bytes_out']} Б, WebP: "
+            f"{stats['webp_bytes']} Б, сэкономлено: {stats['bytes_saved']} Б "
+            f"({stats['saved_ratio']:.1%})")
+        if options['reset']:
+            images.reset_stats()
@@ -0,0 +1,229 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import cache, stats, timeline
+from posts.management.commands.recount_comments import actual_comment_count
+from posts.management.commands.seed_data import manual_dates
+from posts.models import Comment, Group, Post, User
+
+KINDS = ('posts', 'comments')
+
+
+def read_rows(file, input_format):
+    """Построчно читает JSONL или CSV, не загружая файл в память.
+
+    Вместо испорченной строки JSONL отдаётся None: импорт её пропускает,
+    а не обрывается на ней.
+    """
+    if input_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Неверная дата: {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def parse_id(value):
+    """Явный id строки или None; нечисловой id даёт ValueError."""
+    return int(value) if value else None
+
+
+class Command(BaseCommand):
+    help = ('Потоково импортирует записи или комментарии из JSONL/CSV '
+            'пачками bulk_create с возможностью продолжить с контрольной '
+            'точки. Поля записей: id, author, group, text, pub_date; '
+            'комментариев: id, post, author, text, created.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--kind', choices=KINDS, default='posts')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--create-users', action='store_true',
+                            help='Создавать неизвестных авторов вместо '
+                                 'пропуска строк.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Пропустить строки, уже учтённые в '
+                                 'контрольной точке <path>.checkpoint.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        self.kind = options['kind']
+        self.create_users = options['create_users']
+        self.checkpoint_path = f'{path}.checkpoint'
+        input_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        position = self.read_checkpoint() if options['resume'] else 0
+        self.users = dict(User.objects.values_list('username', 'pk')
+                          .iterator())
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.imported = self.skipped = 0
+        started = time.perf_counter()
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = islice(read_rows(file, input_format), position, None)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    self.import_batch(batch)
+                position += len(batch)
+                self.write_checkpoint(position)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Строк: {position}, импортировано: {self.imported}, '
+                    f'пропущено: {self.skipped} '
+                    f'({self.imported / elapsed:.0f} в секунду)')
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(f'Готово за {time.perf_counter() - started:.1f} с')
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                return int(file.read())
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, position):
+        # Пишем через временный файл, чтобы точка не оборвалась на середине.
+        temporary = f'{self.checkpoint_path}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(str(position))
+        os.replace(temporary, self.checkpoint_path)
+
+    def resolve_users(self, batch):
+        missing = ({row.get('author') for row in batch if row} -
+                   {None, ''} - self.users.keys())
+        if not missing or not self.create_users:
+            return
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=username, password=password)
+             for username in missing], ignore_conflicts=True)
+        self.users.update(User.objects.filter(username__in=missing)
+                          .values_list('username', 'pk'))
+
+    def import_batch(self, batch):
+        self.resolve_users(batch)
+        if self.kind == 'posts':
+            self.import_posts(batch)
+        else:
+            self.import_comments(batch)
+
+    def build(self, batch, make):
+        objects = []
+        for row in batch:
+            author_id = row and self.users.get(row.get('author'))
+            try:
+                obj = author_id and make(row, author_id)
+            except (KeyError, TypeError, ValueError):
+                obj = None
+            if obj is None:
+                self.skipped += 1
+                continue
+            objects.append(obj)
+        return objects
+
+    def insert(self, model, objects, date_field):
+        """bulk_create с ignore_conflicts; возвращает вставленные строки.
+
+        SQLite не возвращает pk из bulk_create: новые строки — это pk
+        больше прежнего максимума и явно заданные id, которых до вставки
+        не было. Строки, отброшенные из-за конфликта, считаются
+        пропущенными.
+        """
+        last_pk = model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        explicit = {obj.pk for obj in objects if obj.pk}
+        explicit -= set(model.objects.filter(pk__in=explicit)
+                        .values_list('pk', flat=True))
+        with manual_dates(model, date_field):
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+        inserted = model.objects.filter(Q(pk__gt=last_pk) |
+                                        Q(pk__in=explicit))
+        count = inserted.count()
+        self.imported += count
+        self.skipped += len(objects) - count
+        return inserted
+
+    def import_posts(self, batch):
+        def make(row, author_id):
+            return Post(pk=parse_id(row.get('id')), author_id=author_id,
+                        group_id=self.groups.get(row.get('group')),
+                        text=row['text'],
+                        pub_date=parse_date(row.get('pub_date')))
+
+        posts = self.build(batch, make)
+        if not posts:
+            return
+        # bulk_create не вызывает сигналы: раскладываем записи по лентам
+        # и сбрасываем кэш страниц затронутых авторов и групп сами.
+        timeline.fan_out_posts(self.insert(Post, posts, 'pub_date'))
+        author_ids = {post.author_id for post in posts}
+        stats.recount(author_ids)
+        self.bump(author_ids, {post.group_id for post in posts} - {None})
+
+    def import_comments(self, batch):
+        post_ids = set(Post.objects.filter(
+            pk__in={row.get('post') for row in batch if row}).values_list(
+            'pk', flat=True))
+
+        def make(row, author_id):
+            post_id = int(row['post'])
+            if post_id not in post_ids:
+                return None
+            return Comment(pk=parse_id(row.get('id')), author_id=author_id,
+                           post_id=post_id, text=row['text'],
+                           created=parse_date(row.get('created')))
+
+        comments = self.build(batch, make)
+        if not comments:
+            return
+        self.insert(Comment, comments, 'created')
+        posts = Post.objects.filter(
+            pk__in={comment.post_id for comment in comments})
+        posts.update(comment_count=actual_comment_count())
+        self.bump(set(posts.values_list('author_id', flat=True)),
+                  set(posts.exclude(group=None).values_list('group_id',
+                                                            flat=True)),
+                  {comment.post_id for comment in comments})
+
+    def bump(self, author_ids, group_ids, post_ids=()):
+        usernames = User.objects.filter(pk__in=author_ids).values_list(
+            'username', flat=True)
+        slugs = Group.objects.filter(pk__in=group_ids).values_list(
+            'slug', flat=True)
+        cache.bump(cache.FEED_SCOPE,
+                   *(cache.author_scope(username) for username in usernames),
+                   *(cache.group_scope(slug) for slug in slugs),
+                   *(cache.post_scope(pk) for pk in post_ids))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import ratelimit
+
+
+class Command(BaseCommand):
+    help = 'Показывает число запросов, отклонённых ограничением частоты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счётчики после вывода.')
+
+    def handle(self, *args, **options):
+        for scope, throttled in ratelimit.stats().items():
+            self.stdout.write(f'{scope}: отклонено {throttled}')
+        if options['reset']:
+            ratelimit.reset_stats()
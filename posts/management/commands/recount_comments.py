@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Post
+
+
+def actual_comment_count():
+    counts = (Comment.objects.filter(post=OuterRef('pk'))
+              .order_by().values('post')
+              .annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает Post.comment_count и исправляет записи, '
+            'у которых счётчик разошёлся с реальным числом комментариев.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать число расхождений.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        drifted = (Post.objects.order_by('pk')
+                   .annotate(actual=actual_comment_count())
+                   .exclude(comment_count=F('actual'))
+                   .values_list('pk', flat=True))
+        repaired = 0
+        last_pk = 0
+        while True:
+            batch = list(drifted.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            repaired += len(batch)
+            if options['dry_run']:
+                continue
+            with transaction.atomic():
+                Post.objects.filter(pk__in=batch).update(
+                    comment_count=actual_comment_count())
+        verb = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(f'{verb} записей с неверным счётчиком: {repaired}')
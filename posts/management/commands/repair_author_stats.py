@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import stats
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает AuthorStats и исправляет авторов, у которых '
+            'счётчики разошлись с подписками и записями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=stats.RECOUNT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        users = User.objects.order_by('pk').values_list('pk', flat=True)
+        created = repaired = 0
+        last_pk = 0
+        while True:
+            batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            with transaction.atomic():
+                batch_created, batch_repaired = stats.recount(batch)
+            created += batch_created
+            repaired += batch_repaired
+        self.stdout.write(f'Исправлено авторов: {repaired}, '
+                          f'создано строк: {created}')
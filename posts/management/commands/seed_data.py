@@ -0,0 +1,188 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts import cache, stats, timeline
+from posts.management.commands.recount_comments import actual_comment_count
+from posts.models import Comment, Follow, Group, Post, User
+
+WORDS = ('яндекс', 'практикум', 'джанго', 'лента', 'подписка', 'кэш',
+         'запрос', 'индекс', 'шаблон', 'страница', 'автор', 'группа')
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для random.choices."""
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, size + 1)))
+
+
+@contextmanager
+def manual_dates(model, field_name):
+    """Разрешает задать auto_now_add-поле вручную на время bulk_create."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Быстро наполняет базу синтетическими пользователями, группами, '
+            'записями, комментариями и подписками с перекошенным '
+            '(ципфовским) распределением активности.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить записи.')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель распределения Ципфа.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='По умолчанию — максимум для СУБД.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        # Короткий уникальный префикс: slug группы ограничен 20 символами.
+        self.prefix = f's{int(time.time()):x}'
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            groups = self.create_groups(options['groups'])
+            posts = self.create_posts(options['posts'], users, groups,
+                                      options['days'])
+            self.create_comments(options['comments'], users, posts)
+            self.create_follows(options['follows'], users)
+        self.rebuild_derived_data()
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - started:.1f} с')
+
+    def report(self, name, count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{name}: {count} ({count / elapsed:.0f} в секунду)')
+
+    def create_users(self, count):
+        started = time.perf_counter()
+        password = make_password(None)
+        User.objects.bulk_create(
+            (User(username=f'{self.prefix}_{number}', password=password)
+             for number in range(count)),
+            batch_size=self.batch_size)
+        users = list(User.objects.filter(
+            username__startswith=f'{self.prefix}_').values_list(
+            'pk', flat=True))
+        self.report('Пользователи', len(users), started)
+        return users
+
+    def create_groups(self, count):
+        started = time.perf_counter()
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {number}',
+                   slug=f'{self.prefix}-{number}',
+                   description='Синтетическая группа')
+             for number in range(count)),
+            batch_size=self.batch_size)
+        groups = list(Group.objects.filter(
+            slug__startswith=f'{self.prefix}-').values_list('pk', flat=True))
+        self.report('Группы', len(groups), started)
+        return groups
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words))
+
+    def create_posts(self, count, users, groups, days):
+        started = time.perf_counter()
+        author_weights = zipf_weights(len(users), self.skew)
+        group_weights = zipf_weights(len(groups), self.skew)
+        now = timezone.now()
+        span = timedelta(days=days).total_seconds()
+
+        def build():
+            for _ in range(count):
+                group = None
+                if groups and self.random.random() < 0.7:
+                    group = self.random.choices(
+                        groups, cum_weights=group_weights)[0]
+                yield Post(
+                    text=self.text(self.random.randint(5, 60)),
+                    author_id=self.random.choices(
+                        users, cum_weights=author_weights)[0],
+                    group_id=group,
+                    pub_date=now - timedelta(
+                        seconds=self.random.random() * span),
+                )
+
+        with manual_dates(Post, 'pub_date'):
+            Post.objects.bulk_create(build(), batch_size=self.batch_size)
+        posts = list(Post.objects.filter(
+            author__username__startswith=f'{self.prefix}_').values_list(
+            'pk', 'pub_date'))
+        self.report('Записи', len(posts), started)
+        return posts
+
+    def create_comments(self, count, users, posts):
+        if not posts:
+            return
+        started = time.perf_counter()
+        post_weights = zipf_weights(len(posts), self.skew)
+        now = timezone.now()
+
+        def build():
+            for _ in range(count):
+                post_id, pub_date = self.random.choices(
+                    posts, cum_weights=post_weights)[0]
+                yield Comment(
+                    post_id=post_id,
+                    author_id=self.random.choice(users),
+                    text=self.text(self.random.randint(3, 30)),
+                    created=pub_date + (now - pub_date) * self.random.random(),
+                )
+
+        with manual_dates(Comment, 'created'):
+            Comment.objects.bulk_create(build(), batch_size=self.batch_size)
+        self.report('Комментарии', count, started)
+
+    def create_follows(self, count, users):
+        started = time.perf_counter()
+        author_weights = zipf_weights(len(users), self.skew)
+
+        def build():
+            for _ in range(count):
+                user = self.random.choice(users)
+                author = self.random.choices(
+                    users, cum_weights=author_weights)[0]
+                if user != author:
+                    yield Follow(user_id=user, author_id=author)
+
+        Follow.objects.bulk_create(build(), batch_size=self.batch_size,
+                                   ignore_conflicts=True)
+        self.report('Подписки', count, started)
+
+    def rebuild_derived_data(self):
+        """bulk_create не вызывает сигналы: досчитываем производные данные."""
+        started = time.perf_counter()
+        seeded = f'{self.prefix}_'
+        Post.objects.filter(author__username__startswith=seeded).update(
+            comment_count=actual_comment_count())
+        timeline.reset_celebrities()
+        timeline.backfill_follows(
+            Follow.objects.filter(user__username__startswith=seeded))
+        stats.recount(User.objects.filter(username__startswith=seeded)
+                      .values_list('pk', flat=True))
+        cache.bump(cache.FEED_SCOPE)
+        self.stdout.write(f'Счётчики и ленты пересчитаны за '
+                          f'{time.perf_counter() - started:.1f} с')
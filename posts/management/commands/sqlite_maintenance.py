@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+class Command(BaseCommand):
+    help = ('Обслуживание базы SQLite: ANALYZE, wal_checkpoint и по запросу '
+            'VACUUM с отчётом о размере файлов и времени каждого шага.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--no-analyze', action='store_true',
+                            help='Не обновлять статистику планировщика.')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Пересобрать файл базы (блокирует запись '
+                                 'на всё время работы).')
+        parser.add_argument('--checkpoint', choices=CHECKPOINT_MODES,
+                            default='TRUNCATE',
+                            help='Режим переноса WAL в основной файл.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        with connection.cursor() as cursor:
+            self.cursor = cursor
+            self.path = cursor.execute(
+                'PRAGMA database_list').fetchone()[2]
+            self.report('До обслуживания')
+            if not options['no_analyze']:
+                self.step('ANALYZE', 'ANALYZE')
+            if options['vacuum']:
+                self.step('VACUUM', 'VACUUM')
+            busy, log, checkpointed = self.step(
+                f'wal_checkpoint({options["checkpoint"]})',
+                f'PRAGMA wal_checkpoint({options["checkpoint"]})')
+            self.stdout.write(f'  страниц в WAL: {log}, перенесено: '
+                              f'{checkpointed}, занято читателями: {busy}')
+            self.report('После обслуживания')
+
+    def step(self, title, sql):
+        started = time.perf_counter()
+        row = self.cursor.execute(sql).fetchone()
+        self.stdout.write(
+            f'{title}: {(time.perf_counter() - started) * 1000:.0f} мс')
+        return row
+
+    def pragma(self, name):
+        return self.cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def report(self, title):
+        page_size = self.pragma('page_size')
+        wal = f'{self.path}-wal' if self.path else ''
+        wal_size = os.path.getsize(wal) if os.path.exists(wal) else 0
+        self.stdout.write(
+            f'{title}: журнал {self.pragma("journal_mode")}, '
+            f'база {self.pragma("page_count") * page_size} Б, '
+            f'свободно {self.pragma("freelist_count") * page_size} Б, '
+            f'WAL {wal_size} Б')
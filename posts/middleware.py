@@ -0,0 +1,80 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """execute_wrapper, считающий запросы и суммарное время SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+# Накопленная статистика процесса: url_name -> запросы, число SQL, время.
+stats = {}
+
+
+def _record(url_name, recorder):
+    entry = stats.setdefault(url_name,
+                             {'requests': 0, 'queries': 0, 'sql_time': 0.0})
+    entry['requests'] += 1
+    entry['queries'] += recorder.count
+    entry['sql_time'] += recorder.duration
+
+
+class QueryBudgetMiddleware:
+    """Следит, чтобы view не выходили за бюджет SQL-запросов.
+
+    Бюджеты задаются в settings.QUERY_BUDGETS по имени URL. Превышение
+    пишется в лог при DEBUG, а при QUERY_BUDGET_STRICT (включён в
+    тестах) вызывает QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        # Считаем запросы ко всем базам, включая реплики для чтения.
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        url_name = match.url_name
+        _record(url_name, recorder)
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f'sql;desc="{recorder.count} queries";'
+                f'dur={recorder.duration * 1000:.1f}')
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        if budget is None or recorder.count <= budget:
+            return response
+        message = (f'View {url_name!r} выполнил {recorder.count} '
+                   f'SQL-запросов при бюджете {budget} '
+                   f'({recorder.duration * 1000:.1f} мс)')
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        if settings.DEBUG:
+            logger.warning(message)
+        return response
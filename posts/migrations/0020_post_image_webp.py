@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_webp',
+            field=models.ImageField(blank=True, editable=False, upload_to='posts/webp/', verbose_name='Изображение в WebP'),
+        ),
+    ]
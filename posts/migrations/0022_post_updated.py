@@ -0,0 +1,34 @@
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+# SQLite добавляет и удаляет столбец, пересоздавая таблицу posts_post, и
+# вместе со старой таблицей удаляются триггеры полнотекстового индекса.
+search_index = import_module('posts.migrations.0021_post_search_index')
+create_triggers = search_index._execute(search_index.TRIGGERS_SQL)
+
+
+def copy_pub_date(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_post_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0022_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последняя запись')),
+            ],
+        ),
+    ]
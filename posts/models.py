@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
@@ -19,6 +19,8 @@ class Post(models.Model):
                             help_text='Пишите без ошибок')
     pub_date = models.DateTimeField(verbose_name='date published',
                                     auto_now_add=True)
+    updated = models.DateTimeField(verbose_name='Дата изменения',
+                                   auto_now=True)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name='posts'
@@ -32,9 +34,21 @@ class Post(models.Model):
     image = models.ImageField(upload_to='posts/', blank=True, null=True,
                               verbose_name='Изображение',
                               help_text='Изображение вашего поста.')
+    image_webp = models.ImageField(upload_to='posts/webp/', blank=True,
+                                   editable=False,
+                                   verbose_name='Изображение в WebP')
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев', default=0, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'], name='posts_post_date'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='posts_post_author_date'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='posts_post_group_date'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -52,13 +66,65 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created'],
+                         name='posts_comment_post_created'),
+            models.Index(fields=['-created'], name='posts_comment_created'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчик Post.comment_count обновляется в post_save,
+        # поэтому вставка и инкремент идут в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='follower')
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора для шапки профиля и страницы записи.
+
+    Поддерживаются сигналами на Post и Follow (posts.stats), строка
+    создаётся при первом чтении, а расхождения исправляет команда
+    repair_author_stats.
+    """
+    author = models.OneToOneField(User, on_delete=models.CASCADE,
+                                  primary_key=True, related_name='stats')
+    followers = models.PositiveIntegerField(verbose_name='Подписчиков',
+                                            default=0)
+    following = models.PositiveIntegerField(verbose_name='Подписок',
+                                            default=0)
+    posts = models.PositiveIntegerField(verbose_name='Записей', default=0)
+    last_post = models.DateTimeField(verbose_name='Последняя запись',
+                                     null=True, blank=True)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: запись на каждого подписчика."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date']
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='posts_timeline_user_date'),
+        ]
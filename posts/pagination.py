@@ -0,0 +1,232 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .counts import approximate_count
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+CURSOR_PARAM = 'cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
+# Сколько номеров страниц показывать вокруг текущей и с каждого края.
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, value, pk):
+    value = value.isoformat() if hasattr(value, 'isoformat') else repr(value)
+    raw = f'{direction}|{value}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, parse_value=parse_datetime):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value = parse_value(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        raise InvalidCursor(token)
+    return direction, value, pk
+
+
+class CursorPage(Sequence):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        if not self.object_list:
+            return '<Cursor page (empty)>'
+        return (f'<Cursor page {self.object_list[0].pk}..'
+                f'{self.object_list[-1].pk}>')
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(NEXT, self.object_list[-1])
+
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(PREVIOUS, self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-паджинатор по паре (поле даты, pk) от новых к старым.
+
+    Вместо OFFSET и COUNT(*) каждая страница выбирается условием
+    «строго раньше последней показанной записи», поэтому стоимость
+    запроса не зависит от глубины листания. Поля пары задаются
+    ordering_field и pk_field: это могут быть и аннотации queryset,
+    как у ленты подписок, которая сортируется по колонкам TimelineEntry
+    (см. posts.timeline.feed_for).
+    """
+    is_cursor = True
+    parse_value = staticmethod(parse_datetime)
+
+    def __init__(self, object_list, per_page, ordering_field='pub_date',
+                 pk_field='pk'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering_field = ordering_field
+        self.pk_field = pk_field
+
+    def cursor_for(self, direction, obj):
+        return encode_cursor(direction, getattr(obj, self.ordering_field),
+                             getattr(obj, self.pk_field))
+
+    def _beyond(self, queryset, direction, value, pk):
+        # Нестрогое условие по полю сортировки дублирует OR, но позволяет
+        # SQLite начать чтение индекса с нужного места, а не с начала.
+        field, pk_field = self.ordering_field, self.pk_field
+        if direction == NEXT:
+            return queryset.filter(
+                Q(**{f'{field}__lte': value}),
+                Q(**{f'{field}__lt': value}) | Q(**{f'{pk_field}__lt': pk}))
+        return queryset.filter(
+            Q(**{f'{field}__gte': value}),
+            Q(**{f'{field}__gt': value}) | Q(**{f'{pk_field}__gt': pk}))
+
+    def _newest_first(self, queryset):
+        return queryset.order_by(f'-{self.ordering_field}',
+                                 f'-{self.pk_field}')
+
+    def page(self, cursor=None):
+        queryset = self.object_list
+        direction = NEXT
+        if cursor:
+            direction, value, pk = decode_cursor(cursor, self.parse_value)
+            queryset = self._beyond(queryset, direction, value, pk)
+        if direction == NEXT:
+            queryset = self._newest_first(queryset)
+        else:
+            queryset = queryset.order_by(self.ordering_field, self.pk_field)
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if cursor and not items:
+            # Курсор за краем списка (записи удалены или курсор собран
+            # вручную) даёт первую страницу, как и испорченный курсор.
+            return self.page()
+        if direction == NEXT:
+            return CursorPage(items, self, has_more, bool(cursor))
+        items.reverse()
+        return CursorPage(items, self, True, has_more)
+
+    def more(self, cursor=None):
+        """Следующая порция «показать ещё»: (QuerySet, курсор или None).
+
+        Порция остаётся QuerySet, а не списком, поэтому лишняя строка
+        для проверки продолжения не выбирается: после чтения порции
+        есть ли что-то старше, проверяет exists() по тому же индексу.
+        Курсор назад и испорченный курсор дают первую порцию.
+        """
+        queryset = self._newest_first(self.object_list)
+        if cursor:
+            try:
+                direction, value, pk = decode_cursor(cursor,
+                                                     self.parse_value)
+            except InvalidCursor:
+                direction = None
+            if direction == NEXT:
+                queryset = self._beyond(queryset, NEXT, value, pk)
+        portion = queryset[:self.per_page]
+        items = list(portion)
+        if len(items) < self.per_page:
+            return portion, None
+        last = items[-1]
+        if not self._beyond(queryset, NEXT,
+                            getattr(last, self.ordering_field),
+                            getattr(last, self.pk_field)).exists():
+            return portion, None
+        return portion, self.cursor_for(NEXT, last)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def page_window(number, num_pages, on_each_side=PAGES_ON_EACH_SIDE,
+                on_ends=PAGES_ON_ENDS):
+    """Номера страниц вокруг текущей и у краёв; None обозначает пропуск."""
+    first = max(1, number - on_each_side)
+    last = min(num_pages, number + on_each_side)
+    # Пропуск ставится, только если он скрывает больше одной страницы.
+    if first > on_ends + 2:
+        pages = [*range(1, on_ends + 1), None]
+    else:
+        pages = list(range(1, first))
+    pages.extend(range(first, last + 1))
+    if last < num_pages - on_ends - 1:
+        pages.extend([None, *range(num_pages - on_ends + 1, num_pages + 1)])
+    else:
+        pages.extend(range(last + 1, num_pages + 1))
+    return pages
+
+
+class ApproximatePaginator(Paginator):
+    """Paginator, который берёт число объектов из approximate_count."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return approximate_count(self.object_list)
+        return super().count
+
+    def get_elided_page_range(self, number=1, *,
+                              on_each_side=PAGES_ON_EACH_SIDE,
+                              on_ends=PAGES_ON_ENDS):
+        return page_window(self.validate_number(number), self.num_pages,
+                           on_each_side, on_ends)
+
+
+def paginate(request, object_list, per_page=POSTS_PER_PAGE,
+             ordering_field='pub_date', pk_field='pk'):
+    """Возвращает (paginator, page) для списка записей.
+
+    По умолчанию используется нумерованный Paginator. Если в запросе
+    есть параметр ``cursor``, включается keyset-режим по ordering_field
+    и pk_field.
+    """
+    if CURSOR_PARAM in request.GET:
+        paginator = CursorPaginator(object_list, per_page, ordering_field,
+                                    pk_field)
+        return paginator, paginator.get_page(request.GET.get(CURSOR_PARAM))
+    paginator = Paginator(object_list, per_page)
+    # В контексте шаблонов остаётся обычный Paginator, поэтому число
+    # записей подставляется в него так же, как в ApproximatePaginator.
+    paginator.count = approximate_count(object_list)
+    return paginator, paginator.get_page(request.GET.get('page'))
@@ -0,0 +1,113 @@
+"""Ограничение частоты запросов к view, которые пишут в базу.
+
+Token bucket в варианте GCRA: для пары «область, пользователь или IP»
+кэш хранит одно целое — теоретическое время прихода следующего запроса
+(TAT) в миллисекундах. Запрос атомарно сдвигает его cache.incr на
+интервал между токенами и проходит, если TAT опережает текущее время не
+больше чем на ёмкость корзины. Обычный запрос стоит одного incr и
+продления срока ключа; после простоя TAT подтягивается к текущему
+времени вторым incr, а отклонённый запрос возвращает свой токен через
+decr. Ключ живёт период после последнего запроса: к этому времени TAT
+уже в прошлом и корзина полна, как у нового клиента, поэтому ключи
+бездействующих клиентов истекают, а не копятся в кэше. Ограничения
+задаются в settings.RATE_LIMITS как «N/период»: не больше N запросов
+за период, из них до N подряд.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): число запросов и период в секундах."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+def client_id(request, by):
+    """Кого ограничивать: пользователя или, для анонимов, IP-адрес."""
+    if by == 'user' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _throttled_key(scope):
+    return f'ratelimit:throttled:{scope}'
+
+
+def _count_throttled(scope):
+    key = _throttled_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def hit(scope, client, rate):
+    """Расходует токен клиента.
+
+    Возвращает 0, если запрос разрешён, иначе сколько секунд ждать
+    следующего токена.
+    """
+    limit, period = parse_rate(rate)
+    interval = max(period * 1000 // limit, 1)
+    capacity = interval * limit
+    key = f'ratelimit:{scope}:{client}'
+    now = int(time.time() * 1000)
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        cache.add(key, now, period)
+        tat = cache.incr(key, interval)
+    cache.touch(key, period)
+    if tat - interval < now:
+        # Корзина полна: неизрасходованные токены не копятся.
+        tat = cache.incr(key, now - (tat - interval))
+    if tat - now <= capacity:
+        return 0
+    cache.decr(key, interval)
+    _count_throttled(scope)
+    return math.ceil((tat - now - capacity) / 1000)
+
+
+def ratelimit(scope, by='user', methods=('POST',)):
+    """Ограничивает view по settings.RATE_LIMITS[scope].
+
+    by='user' считает запросы пользователя (анонимов — по IP), by='ip' —
+    всегда по IP. Запросы с методами не из methods не ограничиваются.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATE_LIMITS.get(scope)
+            if (settings.RATE_LIMIT_ENABLED and rate and
+                    request.method in methods):
+                retry_after = hit(scope, client_id(request, by), rate)
+                if retry_after:
+                    response = render(request, 'misc/429.html',
+                                      {'retry_after': retry_after},
+                                      status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stats():
+    """Число отклонённых запросов по областям из RATE_LIMITS."""
+    keys = {_throttled_key(scope): scope for scope in settings.RATE_LIMITS}
+    counts = cache.get_many(keys)
+    return {scope: counts.get(key, 0) for key, scope in keys.items()}
+
+
+def reset_stats():
+    cache.delete_many([_throttled_key(scope)
+                       for scope in settings.RATE_LIMITS])
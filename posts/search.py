@@ -0,0 +1,95 @@
+"""Полнотекстовый поиск по записям на SQLite FTS5.
+
+Индекс posts_post_fts создаётся миграцией 0021 и обновляется
+триггерами. Поиск отбирает записи по rowid из индекса, ранжирует по
+bm25 и листается курсором по паре (score, pk), где score = -bm25:
+чем выше, тем релевантнее. Фрагменты с подсветкой считаются отдельным
+запросом только для записей текущей страницы.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .feeds import feed_queryset
+from .models import Post
+from .pagination import CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+MAX_TERMS = 8
+SNIPPET_TOKENS = 16
+# Служебные символы вместо тегов: текст фрагмента экранируется, и только
+# потом маркеры заменяются на <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def match_expression(query):
+    """Превращает пользовательский запрос в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки (синтаксис FTS5 из запроса не
+    работает) и ищется по префиксу; слова объединяются через AND.
+    """
+    terms = _TERM_RE.findall(query.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_posts(query, group=None, author=None):
+    """Записи, найденные по запросу, с атрибутом score для сортировки."""
+    expression = match_expression(query)
+    if not expression:
+        return Post.objects.none()
+    # bm25 доступен только в запросе, который читает индекс через MATCH,
+    # поэтому релевантность считается коррелированным подзапросом.
+    score = RawSQL(f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                   f'WHERE {FTS_TABLE} MATCH %s '
+                   f'AND {FTS_TABLE}.rowid = posts_post.id', (expression,))
+    queryset = filter_matching(feed_queryset(), query).annotate(
+        score=score)
+    if group:
+        queryset = queryset.filter(group__slug=group)
+    if author:
+        queryset = queryset.filter(author__username=author)
+    return queryset
+
+
+def filter_matching(queryset, query):
+    """Оставляет в queryset записей только найденные индексом."""
+    # RawSQL внутри pk__in Django оборачивает в лишние скобки, и SQLite
+    # читает подзапрос как скалярный, поэтому условие задаётся через extra.
+    return queryset.extra(
+        where=[f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s)'],
+        params=[match_expression(query)])
+
+
+def attach_snippets(posts, query):
+    """Проставляет записям атрибут snippet с подсвеченными совпадениями."""
+    posts = list(posts)
+    if not posts:
+        return posts
+    placeholders = ', '.join(['%s'] * len(posts))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid IN ({placeholders})',
+            [MARK_START, MARK_END, '…', SNIPPET_TOKENS,
+             match_expression(query), *(post.pk for post in posts)])
+        snippets = dict(cursor.fetchall())
+    for post in posts:
+        snippet = escape(snippets.get(post.pk, post.text))
+        post.snippet = (snippet.replace(MARK_START, '<mark>')
+                        .replace(MARK_END, '</mark>'))
+    return posts
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорный паджинатор по релевантности вместо даты."""
+    parse_value = staticmethod(float)
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page, ordering_field='score')
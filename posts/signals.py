@@ -0,0 +1,110 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, stats, timeline
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.refresh_celebrity(instance.author_id)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    timeline.trim(instance.user_id, instance.author_id)
+    timeline.refresh_celebrity(instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, **kwargs):
+    instance._previous_group_slug = None
+    if instance.pk:
+        instance._previous_group_slug = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group__slug', flat=True).first())
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    scopes = [cache.FEED_SCOPE, cache.post_scope(instance.pk),
+              cache.author_scope(instance.author.username)]
+    slugs = {getattr(instance, '_previous_group_slug', None)}
+    if instance.group_id:
+        slugs.add(instance.group.slug)
+    scopes.extend(cache.group_scope(slug) for slug in slugs if slug)
+    cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    scopes = [cache.FEED_SCOPE, cache.post_scope(instance.post_id)]
+    post = (Post.objects.filter(pk=instance.post_id)
+            .values_list('author__username', 'group__slug').first())
+    if post:
+        username, slug = post
+        scopes.append(cache.author_scope(username))
+        if slug:
+            scopes.append(cache.group_scope(slug))
+    cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    cache.bump(cache.author_scope(instance.author.username),
+               cache.author_scope(instance.user.username))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    cache.bump(cache.group_scope(instance.slug))
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.author_id, last_post=True, posts=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_removed_post(sender, instance, **kwargs):
+    stats.adjust(instance.author_id, last_post=True, posts=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.author_id, followers=1)
+        stats.adjust(instance.user_id, following=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_removed_follow(sender, instance, **kwargs):
+    stats.adjust(instance.author_id, followers=-1)
+    stats.adjust(instance.user_id, following=-1)
@@ -0,0 +1,109 @@
+"""Предрассчитанные счётчики авторов (AuthorStats).
+
+Шапки профиля и страницы записи читают подписчиков, подписки, число
+записей и время последней записи одним обращением к кэшу, а при промахе
+одним запросом по первичному ключу. Сигналы на Post и Follow меняют
+счётчики инкрементом F() и сбрасывают кэш; bulk-операции, которые
+сигналов не вызывают, пересчитывают затронутых авторов через recount.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Follow, Post, User
+
+FIELDS = ('followers', 'following', 'posts', 'last_post')
+# Сколько авторов пересчитывать одним запросом (лимит параметров SQLite).
+RECOUNT_BATCH_SIZE = 500
+
+
+def _key(author_id):
+    return f'authorstats:{author_id}'
+
+
+def author_stats(author_id):
+    """Счётчики автора: из кэша, из таблицы или, впервые, пересчётом."""
+    stats = cache.get(_key(author_id))
+    if stats is None:
+        stats = AuthorStats.objects.filter(author_id=author_id).first()
+        if stats is None:
+            _, *values = actual_stats(
+                User.objects.filter(pk=author_id)).get()
+            stats = AuthorStats(author_id=author_id,
+                                **dict(zip(FIELDS, values)))
+            AuthorStats.objects.bulk_create([stats], ignore_conflicts=True)
+        cache.set(_key(author_id), stats, settings.AUTHOR_STATS_TIMEOUT)
+    return stats
+
+
+def _last_post(author_id):
+    return Subquery(Post.objects.filter(author_id=author_id)
+                    .order_by('-pub_date').values('pub_date')[:1])
+
+
+def adjust(author_id, last_post=False, **deltas):
+    """Сдвигает счётчики автора; last_post=True обновляет дату записи.
+
+    Если строки ещё нет, прибавление создаёт её пересчётом, а
+    вычитание ничего не делает: его вызывают и сигналы каскадного
+    удаления пользователя, и созданная строка ссылалась бы на
+    удаляемого автора. Кэш сбрасывается после фиксации транзакции:
+    иначе параллельный запрос успел бы положить в него строку до
+    изменения.
+    """
+    changes = {field: Greatest(F(field) + delta, 0)
+               for field, delta in deltas.items()}
+    if last_post:
+        changes['last_post'] = _last_post(author_id)
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        **changes)
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        recount([author_id])
+    transaction.on_commit(lambda: cache.delete(_key(author_id)))
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')), 0)
+
+
+def actual_stats(users):
+    """Настоящие значения счётчиков для queryset пользователей."""
+    return users.annotate(
+        followers_actual=_count(Follow, 'author'),
+        following_actual=_count(Follow, 'user'),
+        posts_actual=_count(Post, 'author'),
+        last_post_actual=_last_post(OuterRef('pk')),
+    ).values_list('pk', *(f'{field}_actual' for field in FIELDS))
+
+
+def recount(author_ids):
+    """Пересчитывает счётчики авторов.
+
+    Возвращает пару: сколько строк создано и сколько исправлено.
+    """
+    author_ids = list(author_ids)
+    total_created = total_updated = 0
+    for start in range(0, len(author_ids), RECOUNT_BATCH_SIZE):
+        batch = author_ids[start:start + RECOUNT_BATCH_SIZE]
+        existing = AuthorStats.objects.in_bulk(batch)
+        created, updated = [], []
+        for pk, *values in actual_stats(User.objects.filter(pk__in=batch)):
+            actual = dict(zip(FIELDS, values))
+            stats = existing.get(pk)
+            if stats is None:
+                created.append(AuthorStats(author_id=pk, **actual))
+            elif any(getattr(stats, field) != value
+                     for field, value in actual.items()):
+                for field, value in actual.items():
+                    setattr(stats, field, value)
+                updated.append(stats)
+        AuthorStats.objects.bulk_create(created, ignore_conflicts=True)
+        AuthorStats.objects.bulk_update(updated, FIELDS)
+        cache.delete_many([_key(pk) for pk in batch])
+        total_created += len(created)
+        total_updated += len(updated)
+    return total_created, total_updated
@@ -0,0 +1,25 @@
+"""Фоновые задачи записей и комментариев (см. tasks.queue)."""
+from django.core.mail import send_mail
+from django.urls import reverse
+
+from tasks.queue import task
+
+from .models import Comment
+
+
+@task()
+def notify_post_author(comment_id):
+    """Сообщает автору записи о новом комментарии к ней."""
+    comment = (Comment.objects.select_related('author', 'post__author')
+               .filter(pk=comment_id).first())
+    if comment is None:
+        return
+    post = comment.post
+    if post.author_id == comment.author_id or not post.author.email:
+        return
+    url = reverse('post', kwargs={'username': post.author.username,
+                                  'post_id': post.pk})
+    send_mail(f'Новый комментарий к записи «{post}»',
+              f'{comment.author.username} пишет:\n\n{comment.text}\n\n'
+              f'Запись: {url}',
+              None, [post.author.email])
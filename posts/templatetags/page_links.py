@@ -0,0 +1,12 @@
+"""Окно номеров страниц для paginator.html."""
+from django import template
+
+from ..pagination import page_window as window
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page):
+    """Номера страниц вокруг текущей; None — место для многоточия."""
+    return window(page.number, page.paginator.num_pages)
@@ -0,0 +1,84 @@
+"""Кэш отрендеренных карточек записей для лент.
+
+Карточка (post_card.html) одинакова для всех посетителей и хранится
+в кэше по ключу (id, updated, comment_count): редактирование меняет
+updated, а комментарии — счётчик. Зависящая от посетителя кнопка
+«Редактировать» подставляется в готовый HTML вместо маркера, так что
+на попадании шаблонизатор не запускается вовсе. Ленты выводят
+страницу тегом post_cards: одно обращение к кэшу на все карточки.
+"""
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+ACTIONS_MARKER = '<!-- post-actions -->'
+
+
+def card_key(post):
+    return (f'postcard:{post.pk}:{post.updated.timestamp()}:'
+            f'{post.comment_count}')
+
+
+def _thumbnails_pending(post, html):
+    # Пока миниатюра не готова, DeferredThumbnailBackend отдаёт исходный
+    # файл; такую карточку не кэшируем, иначе миниатюра не появится.
+    return any(image and image.url in html
+               for image in (post.image, post.image_webp))
+
+
+def _actions(user, post):
+    if user is None or user.pk != post.author_id:
+        return ''
+    return format_html(
+        '<a class="btn btn-sm btn-info" href="{}" role="button">'
+        'Редактировать</a>',
+        reverse('post_edit', args=[user.username, post.pk]))
+
+
+def _with_actions(html, user, post):
+    return html.replace(ACTIONS_MARKER, _actions(user, post))
+
+
+def _render(post):
+    return render_to_string('post_card.html', {'post': post})
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    key = card_key(post)
+    html = cache.get(key)
+    if html is None:
+        html = _render(post)
+        if not _thumbnails_pending(post, html):
+            cache.set(key, html, settings.POST_CARD_TIMEOUT)
+    return mark_safe(_with_actions(html, context.get('user'), post))
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Карточки всей страницы ленты.
+
+    Кэш читается одним get_many, отрендеренные заново карточки
+    записываются одним set_many.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = _render(post)
+            if not _thumbnails_pending(post, html):
+                rendered[key] = html
+        cards.append(_with_actions(html, context.get('user'), post))
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_TIMEOUT)
+    return mark_safe(''.join(cards))
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User
+from posts.pagination import ApproximatePaginator
+
+POST_CHANGELIST_URL = reverse('admin:posts_post_changelist')
+COMMENT_CHANGELIST_URL = reverse('admin:posts_comment_changelist')
+FOLLOW_CHANGELIST_URL = reverse('admin:posts_follow_changelist')
+
+
+class LargeTableAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        cls.authors = [User.objects.create(username=f'author{number}')
+                       for number in range(3)]
+        cls.post = Post.objects.create(text='Первая запись',
+                                       author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, number):
+        for author in self.authors:
+            post = Post.objects.create(text=f'Запись {number}',
+                                       author=author)
+            Comment.objects.create(text='Комментарий', post=post,
+                                   author=author)
+            Follow.objects.get_or_create(user=self.admin, author=author)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return context
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк"""
+        for url in (POST_CHANGELIST_URL, COMMENT_CHANGELIST_URL,
+                    FOLLOW_CHANGELIST_URL):
+            with self.subTest(url=url):
+                self.add_rows(1)
+                self.count_queries(url)
+                before = len(self.count_queries(url))
+                self.add_rows(2)
+                self.assertEqual(len(self.count_queries(url)), before)
+
+    def test_changelist_skips_full_count(self):
+        """Список считает строки приблизительно и без общего COUNT"""
+        self.add_rows(1)
+        response = self.client.get(POST_CHANGELIST_URL, {'q': 'запись'})
+        changelist = response.context['cl']
+        self.assertIsInstance(changelist.paginator, ApproximatePaginator)
+        self.assertIsNone(changelist.full_result_count)
+        self.assertEqual(changelist.result_count, 4)
+
+    def test_stale_low_estimate_does_not_load_whole_table(self):
+        """Заниженная оценка не отключает постраничный вывод"""
+        self.add_rows(1)
+        post_admin = site._registry[Post]
+        with mock.patch.object(post_admin, 'list_per_page', 2), \
+                mock.patch.object(post_admin, 'list_max_show_all', 2), \
+                mock.patch('posts.admin.approximate_count',
+                           return_value=1):
+            changelist = self.client.get(POST_CHANGELIST_URL).context['cl']
+            self.assertTrue(changelist.multi_page)
+            self.assertFalse(changelist.can_show_all)
+            self.assertEqual(len(changelist.result_list), 2)
+            response = self.client.get(POST_CHANGELIST_URL, {'p': 1})
+            self.assertEqual(len(response.context['cl'].result_list), 2)
+            response = self.client.get(POST_CHANGELIST_URL, {'p': 5})
+            self.assertNotIn('cl', response.context or {})
+
+    def test_follow_changelist_has_no_author_filter(self):
+        """В списке подписок нет фильтра со всеми пользователями"""
+        response = self.client.get(FOLLOW_CHANGELIST_URL)
+        self.assertFalse(response.context['cl'].has_filters)
+
+    def test_related_fields_use_lookup_widgets(self):
+        """Авторы и записи выбираются автодополнением или по id"""
+        self.assertIn('author', site._registry[Post].autocomplete_fields)
+        self.assertIn('post', site._registry[Comment].raw_id_fields)
+        self.assertIn('user', site._registry[Follow].autocomplete_fields)
+
+    def test_username_search_is_exact(self):
+        """Комментарии и подписки ищутся по точному имени пользователя"""
+        self.add_rows(1)
+        response = self.client.get(COMMENT_CHANGELIST_URL,
+                                   {'q': 'author1'})
+        authors = {comment.author
+                   for comment in response.context['cl'].result_list}
+        self.assertEqual(authors, {self.authors[1]})
+        response = self.client.get(FOLLOW_CHANGELIST_URL, {'q': 'author'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+        response = self.client.get(FOLLOW_CHANGELIST_URL, {'q': 'admin'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_search_without_words_skips_scan(self):
+        """Запрос без слов не переходит к обходу таблицы через LIKE"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(POST_CHANGELIST_URL, {'q': '!!!'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+        self.assertFalse([query for query in context.captured_queries
+                          if 'LIKE' in query['sql']])
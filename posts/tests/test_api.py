@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+API_POSTS_URL = reverse('api_posts')
+API_FOLLOW_URL = reverse('api_follow')
+API_GROUPS_URL = reverse('api_groups')
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.reader = User.objects.create(username='ivan')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Запись {number}', author=cls.author, group=cls.group)
+            for number in range(12))
+        cls.post = Post.objects.create(text='Последняя', author=cls.author)
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_posts_cursor_pagination(self):
+        """Лента листается курсором до конца без повторов"""
+        first = self.client.get(API_POSTS_URL).json()
+        self.assertEqual(first['results'][0]['id'], self.post.pk)
+        self.assertEqual(first['results'][0]['comment_count'], 1)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        ids = [item['id'] for item in first['results'] + second['results']]
+        self.assertEqual(len(ids), 13)
+        self.assertEqual(len(set(ids)), 13)
+        self.assertIsNone(second['next'])
+
+    def test_limit_is_capped(self):
+        """limit ограничен сверху и снизу"""
+        response = self.client.get(API_POSTS_URL, {'limit': 1000})
+        self.assertEqual(len(response.json()['results']), 13)
+        response = self.client.get(API_POSTS_URL, {'limit': 0})
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_unchanged_feed_answers_304(self):
+        """Неизменившаяся лента отвечает 304, изменение сбрасывает ETag"""
+        response = self.client.get(API_POSTS_URL)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        cached = self.client.get(API_POSTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.post.text = 'Исправленная'
+        self.post.save()
+        changed = self.client.get(API_POSTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+
+    def test_if_modified_since_alone_is_not_enough(self):
+        """Без ETag удалённая запись не прячется за ответом 304"""
+        self.client.get(API_POSTS_URL)
+        Post.objects.filter(pk=self.post.pk).delete()
+        response = self.client.get(
+            API_POSTS_URL,
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2099 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.post.pk,
+                         [item['id'] for item in response.json()['results']])
+
+    def test_comments_and_profile(self):
+        """Комментарии записи и счётчики профиля"""
+        comments = self.client.get(
+            reverse('api_post_comments', args=[self.post.pk])).json()
+        self.assertEqual([item['author'] for item in comments['results']],
+                         ['ivan'])
+        profile = self.client.get(
+            reverse('api_profile', args=['pavel'])).json()
+        self.assertEqual((profile['posts'], profile['followers'],
+                          profile['following']), (13, 1, 0))
+
+    def test_group_posts_and_groups(self):
+        """Записи группы и список групп"""
+        response = self.client.get(
+            reverse('api_group_posts', args=['group']), {'limit': 100})
+        self.assertEqual(len(response.json()['results']), 12)
+        groups = self.client.get(API_GROUPS_URL).json()['results']
+        self.assertEqual([group['slug'] for group in groups], ['group'])
+
+    def test_follow_feed(self):
+        """Лента подписок требует входа и отдаёт записи авторов"""
+        self.assertEqual(self.client.get(API_FOLLOW_URL).status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.client.get(API_FOLLOW_URL)
+        self.assertEqual(response.json()['results'][0]['id'], self.post.pk)
+        etag = response['ETag']
+        Follow.objects.filter(user=self.reader).delete()
+        response = self.client.get(API_FOLLOW_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_follow_feed_etag_is_scoped_to_viewer(self):
+        """ETag ленты подписок не зависит от записей чужих авторов"""
+        self.client.force_login(self.reader)
+        etag = self.client.get(API_FOLLOW_URL)['ETag']
+        stranger = User.objects.create(username='stranger')
+        Post.objects.create(text='Чужая запись', author=stranger)
+        response = self.client.get(API_FOLLOW_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новая запись', author=self.author)
+        response = self.client.get(API_FOLLOW_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, Follow, Post, User
+from posts.stats import author_stats
+
+
+class AuthorStatsSignalTest(TransactionTestCase):
+    """Кэш сбрасывается после фиксации, поэтому транзакции настоящие."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='pavel')
+        self.reader = User.objects.create(username='ivan')
+
+    def counters(self, user):
+        stats = author_stats(user.pk)
+        return stats.followers, stats.following, stats.posts
+
+    def test_signals_keep_counters(self):
+        """Сигналы Post и Follow обновляют счётчики и дату записи"""
+        self.assertEqual(self.counters(self.author), (0, 0, 0))
+        first = Post.objects.create(text='Первая', author=self.author)
+        second = Post.objects.create(text='Вторая', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counters(self.author), (1, 0, 2))
+        self.assertEqual(self.counters(self.reader), (0, 1, 0))
+        self.assertEqual(author_stats(self.author.pk).last_post,
+                         second.pub_date)
+        second.delete()
+        follow.delete()
+        self.assertEqual(self.counters(self.author), (0, 0, 1))
+        self.assertEqual(author_stats(self.author.pk).last_post,
+                         first.pub_date)
+
+    def test_cache_is_reset_after_commit(self):
+        """До фиксации транзакции в кэше остаются прежние счётчики"""
+        self.assertEqual(self.counters(self.author), (0, 0, 0))
+        with transaction.atomic():
+            Post.objects.create(text='Текст', author=self.author)
+            self.assertEqual(self.counters(self.author), (0, 0, 0))
+        self.assertEqual(self.counters(self.author), (0, 0, 1))
+
+    def test_missing_row_is_created(self):
+        """Изменение без строки AuthorStats создаёт её пересчётом"""
+        Post.objects.create(text='Текст', author=self.author)
+        AuthorStats.objects.all().delete()
+        Follow.objects.create(user=self.reader, author=self.author)
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual((stats.followers, stats.posts), (1, 1))
+        self.assertEqual(AuthorStats.objects.get(author=self.reader)
+                         .following, 1)
+
+
+    def test_user_with_posts_and_follows_can_be_deleted(self):
+        """Удаление пользователя не создаёт заново его строку счётчиков"""
+        Post.objects.create(text='Текст', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        author_stats(self.author.pk)
+        self.author.delete()
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(AuthorStats.objects.filter(
+            author_id=self.author.pk).exists())
+        self.assertEqual(self.counters(self.reader), (0, 0, 0))
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.reader = User.objects.create(username='ivan')
+
+    def setUp(self):
+        cache.clear()
+
+    def counters(self, user):
+        stats = author_stats(user.pk)
+        return stats.followers, stats.following, stats.posts
+
+    def test_cached_lookup(self):
+        """Повторное чтение счётчиков не обращается к базе"""
+        author_stats(self.author.pk)
+        with CaptureQueriesContext(connection) as queries:
+            author_stats(self.author.pk)
+        self.assertEqual(len(queries), 0)
+
+    def test_profile_header_uses_stats(self):
+        """Шапка профиля не считает подписки и записи запросами COUNT"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        author_stats(self.author.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse('profile', args=['pavel']))
+        self.assertContains(response, 'Подписчиков: 1')
+        counts = [query['sql'] for query in queries.captured_queries
+                  if 'posts_follow' in query['sql']]
+        self.assertEqual(counts, [])
+
+    def test_repair_command_fixes_drift(self):
+        """repair_author_stats исправляет разошедшиеся счётчики"""
+        Post.objects.create(text='Текст', author=self.author)
+        author_stats(self.author.pk)
+        AuthorStats.objects.filter(author=self.author).update(posts=7)
+        out = StringIO()
+        call_command('repair_author_stats', stdout=out)
+        self.assertIn('Исправлено авторов: 1', out.getvalue())
+        self.assertEqual(author_stats(self.author.pk).posts, 1)
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import cache as page_cache
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME = 'pavel'
+GROUP_SLUG = 'testslug'
+GROUP_URL = reverse('group', args=[GROUP_SLUG])
+PROFILE_URL = reverse('profile', args=[USERNAME])
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        cls.group = Group.objects.create(title='Группа', slug=GROUP_SLUG,
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Тестовый текст',
+                                       author=cls.author, group=cls.group)
+        cls.POST_URL = reverse('post', args=[USERNAME, cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_repeated_requests_hit_cache(self):
+        """Повторные анонимные запросы не рендерят шаблон"""
+        for url in (GROUP_URL, PROFILE_URL, self.POST_URL):
+            with self.subTest(url=url):
+                self.assertIsNotNone(self.guest_client.get(url).context)
+                self.assertIsNone(self.guest_client.get(url).context)
+        stats = page_cache.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 3)
+
+    @override_settings(PAGE_CACHE_STATS_SAMPLE_RATE=0.25)
+    def test_stats_are_sampled(self):
+        """Счётчики пишутся для доли обращений и пересчитываются"""
+        with mock.patch('posts.cache.random.random',
+                        side_effect=[0.1, 0.5, 0.2, 0.9]):
+            for _ in range(4):
+                self.guest_client.get(GROUP_URL)
+        self.assertEqual(page_cache.stats()['hits'], 4)
+        self.assertEqual(page_cache.stats()['misses'], 4)
+        with override_settings(PAGE_CACHE_STATS_SAMPLE_RATE=0):
+            page_cache.reset_stats()
+            self.guest_client.get(GROUP_URL)
+            self.assertIsNone(cache.get(page_cache.HITS_KEY))
+
+    def test_group_delete_invalidates_group_page(self):
+        """Удалённая группа не отдаётся из кэша"""
+        self.guest_client.get(GROUP_URL)
+        Group.objects.filter(slug=GROUP_SLUG).delete()
+        self.assertEqual(self.guest_client.get(GROUP_URL).status_code, 404)
+
+    def test_comment_invalidates_dependent_pages(self):
+        """Новый комментарий сбрасывает страницы записи, группы и автора"""
+        urls = (GROUP_URL, PROFILE_URL, self.POST_URL)
+        for url in urls:
+            self.guest_client.get(url)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Свежий комментарий')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIsNotNone(self.guest_client.get(url).context)
+
+    def test_follow_invalidates_profile(self):
+        """Подписка сбрасывает кэш страницы автора"""
+        self.guest_client.get(PROFILE_URL)
+        Follow.objects.create(user=User.objects.create(username='reader'),
+                              author=self.author)
+        response = self.guest_client.get(PROFILE_URL)
+        self.assertIsNotNone(response.context)
+
+    def test_moving_post_invalidates_previous_group(self):
+        """Перенос записи в другую группу сбрасывает кэш прежней группы"""
+        self.guest_client.get(GROUP_URL)
+        self.post.group = Group.objects.create(title='Другая', slug='other',
+                                               description='Описание')
+        self.post.save()
+        response = self.guest_client.get(GROUP_URL)
+        self.assertNotContains(response, 'Тестовый текст')
+
+    def test_authorized_requests_are_not_cached(self):
+        """Страницы для авторизованных пользователей не кэшируются"""
+        client = Client()
+        client.force_login(self.author)
+        client.get(PROFILE_URL)
+        self.assertIsNotNone(client.get(PROFILE_URL).context)
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.stats import author_stats
+
+
+class SeedDataTest(TestCase):
+    def test_seed_data_creates_requested_volumes(self):
+        """seed_data создаёт данные и досчитывает счётчики и ленты"""
+        call_command('seed_data', users=20, groups=3, posts=100,
+                     comments=150, follows=40, seed=1, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 150)
+        self.assertTrue(Follow.objects.exists())
+        post = Post.objects.order_by('-comment_count').first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        follow = Follow.objects.first()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=follow.user,
+                                         post__author=follow.author).count(),
+            follow.author.posts.count())
+
+    def test_bench_views_reports_percentiles(self):
+        """bench_views выводит перцентили и число запросов в JSON"""
+        call_command('seed_data', users=10, groups=2, posts=30,
+                     comments=30, follows=20, seed=1, stdout=StringIO())
+        out = StringIO()
+        call_command('bench_views', requests=3, seed=1, stdout=out)
+        report = json.loads(out.getvalue())
+        for name in ('index', 'group', 'profile', 'post'):
+            with self.subTest(view=name):
+                self.assertLessEqual(report['views'][name]['p50_ms'],
+                                     report['views'][name]['p99_ms'])
+                self.assertGreater(report['views'][name]['queries_max'], 0)
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.reader = User.objects.create(username='ivan')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_import_posts_and_comments(self):
+        """Импорт записей и комментариев досчитывает ленты и счётчики"""
+        rows = [
+            {'id': 100, 'author': 'pavel', 'group': 'group',
+             'text': 'Первая', 'pub_date': '2020-01-01T10:00:00'},
+            {'id': 101, 'author': 'pavel', 'text': 'Вторая'},
+            {'id': 102, 'author': 'unknown', 'text': 'Без автора'},
+        ]
+        posts = self.write('posts.jsonl',
+                           '\n'.join(json.dumps(row) for row in rows))
+        comments = self.write(
+            'comments.csv',
+            'post,author,text,created\n'
+            '100,ivan,Комментарий,2020-01-02T10:00:00\n'
+            '100,pavel,Ответ,\n'
+            '999,ivan,К несуществующей записи,\n')
+        out = StringIO()
+        self.assertEqual(author_stats(self.author.pk).posts, 0)
+        call_command('import_posts', posts, batch_size=2, stdout=out)
+        call_command('import_posts', comments, kind='comments', stdout=out)
+        self.assertEqual(sorted(Post.objects.values_list('pk', flat=True)),
+                         [100, 101])
+        self.assertEqual(Post.objects.get(pk=100).group, self.group)
+        self.assertEqual(Post.objects.get(pk=100).comment_count, 2)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader)
+                         .count(), 2)
+        self.assertEqual(author_stats(self.author.pk).posts, 2)
+        self.assertIn('пропущено: 1', out.getvalue())
+        self.assertFalse(os.path.exists(f'{posts}.checkpoint'))
+
+    def test_malformed_lines_and_conflicts_are_skipped(self):
+        """Испорченные строки, нечисловые и занятые id пропускаются"""
+        Post.objects.create(pk=100, author=self.author, text='Была')
+        path = self.write('posts.jsonl', '\n'.join([
+            json.dumps({'id': 100, 'author': 'pavel', 'text': 'Повтор'}),
+            '{"author": "pavel", "text": "оборвана',
+            '[1, 2]',
+            json.dumps({'id': 'abc', 'author': 'pavel', 'text': 'Не id'}),
+            json.dumps({'author': 'pavel', 'text': 'Новая'}),
+        ]))
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Была', 'Новая'])
+        self.assertIn('импортировано: 1, пропущено: 4', out.getvalue())
+
+    def test_resume_from_checkpoint(self):
+        """С --resume уже импортированные строки пропускаются"""
+        path = self.write('posts.csv', 'author,text\n' + ''.join(
+            f'pavel,Запись {number}\n' for number in range(5)))
+        with open(f'{path}.checkpoint', 'w') as file:
+            file.write('3')
+        call_command('import_posts', path, resume=True, stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Запись 3', 'Запись 4'])
+
+    def test_create_users(self):
+        """С --create-users неизвестные авторы создаются"""
+        path = self.write('posts.jsonl',
+                          json.dumps({'author': 'newbie', 'text': 'Текст'}))
+        call_command('import_posts', path, create_users=True,
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.get().author.username, 'newbie')
+
+
+class SQLiteMaintenanceTest(TransactionTestCase):
+    def test_reports_each_step(self):
+        """sqlite_maintenance выполняет шаги и печатает отчёт"""
+        out = StringIO()
+        call_command('sqlite_maintenance', vacuum=True, stdout=out)
+        report = out.getvalue()
+        for title in ('До обслуживания', 'ANALYZE', 'VACUUM',
+                      'wal_checkpoint(TRUNCATE)', 'После обслуживания'):
+            with self.subTest(step=title):
+                self.assertIn(title, report)
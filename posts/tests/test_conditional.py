@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.reader = User.objects.create(username='ivan')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Текст', author=cls.author,
+                                       group=cls.group)
+        cls.urls = {
+            'post': reverse('post', args=['pavel', cls.post.pk]),
+            'profile': reverse('profile', args=['pavel']),
+            'group': reverse('group', args=['group']),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_answer_304(self):
+        """Повторный запрос с ETag получает 304 без рендера шаблона"""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    revalidated = self.revalidate(url, response['ETag'])
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertIsNone(revalidated.context)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_no_last_modified(self):
+        """Удаление записи не прячется за 304 по If-Modified-Since"""
+        extra = Post.objects.create(text='Удаляемая', author=self.author,
+                                    group=self.group)
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                self.assertFalse(response.has_header('Last-Modified'))
+        extra.delete()
+        revalidated = self.client.get(
+            self.urls['group'],
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2099 00:00:00 GMT')
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertNotContains(revalidated, 'Удаляемая')
+
+    def test_comment_changes_post_page(self):
+        """Новый комментарий меняет ETag страницы записи"""
+        url = self.urls['post']
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_follow_changes_author_pages(self):
+        """Подписка меняет счётчики автора на профиле и странице записи"""
+        etags = {name: self.client.get(url)['ETag']
+                 for name, url in self.urls.items()}
+        Follow.objects.create(user=self.reader, author=self.author)
+        for name in ('post', 'profile'):
+            with self.subTest(page=name):
+                response = self.revalidate(self.urls[name], etags[name])
+                self.assertEqual(response.status_code, 200)
+
+    def test_validators_depend_on_viewer(self):
+        """Авторизованный пользователь не получает 304 от чужой страницы"""
+        url = self.urls['profile']
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.reader)
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
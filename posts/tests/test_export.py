@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PROFILE_EXPORT_URL = reverse('export_profile', args=['pavel'])
+GROUP_EXPORT_URL = reverse('export_group', args=['group'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.other = User.objects.create(username='ivan')
+        cls.moderator = User.objects.create(username='moder', is_staff=True)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(text=f'Запись {number}', author=cls.author,
+                                group=cls.group)
+            for number in range(3)]
+        cls.posts[0].image = SimpleUploadedFile('small.gif', SMALL_GIF,
+                                                'image/gif')
+        cls.posts[0].save()
+        Comment.objects.create(post=cls.posts[1], author=cls.other,
+                               text='Первый')
+        Comment.objects.create(post=cls.posts[1], author=cls.author,
+                               text='Второй')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, user, url, **params):
+        client = Client()
+        client.force_login(user)
+        return client.get(url, params)
+
+    def test_profile_export_is_streamed_jsonl(self):
+        """Автор получает свои записи потоком в JSONL"""
+        response = self.get(self.author, PROFILE_EXPORT_URL)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['text'] for line in lines],
+                         ['Запись 0', 'Запись 1', 'Запись 2'])
+
+    def test_export_permissions(self):
+        """Чужой профиль и группу выгружает только модератор"""
+        self.assertEqual(self.get(self.other, PROFILE_EXPORT_URL)
+                         .status_code, 403)
+        self.assertEqual(self.get(self.author, GROUP_EXPORT_URL)
+                         .status_code, 403)
+        self.assertEqual(self.get(self.moderator, PROFILE_EXPORT_URL)
+                         .status_code, 200)
+
+    def test_group_export_csv_with_comments(self):
+        """CSV группы содержит записи и их комментарии по порядку"""
+        response = self.get(self.moderator, GROUP_EXPORT_URL, format='csv')
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual([(row['type'], row['text']) for row in rows], [
+            ('post', 'Запись 0'), ('post', 'Запись 1'),
+            ('comment', 'Первый'), ('comment', 'Второй'),
+            ('post', 'Запись 2')])
+        self.assertEqual(rows[2]['post'], str(self.posts[1].pk))
+
+    def test_zip_with_images(self):
+        """Архив содержит файл данных и изображения"""
+        response = self.get(self.author, PROFILE_EXPORT_URL, images='1')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(
+            b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(),
+                         ['posts.jsonl', 'images/posts/small.gif'])
+        self.assertEqual(archive.read('images/posts/small.gif'), SMALL_GIF)
+
+    def test_zip_entries_use_zip64(self):
+        """Записи архива пишутся с zip64, чтобы не упереться в 4 ГиБ"""
+        response = self.get(self.author, PROFILE_EXPORT_URL, images='1')
+        content = b''.join(response.streaming_content)
+        archive = zipfile.ZipFile(io.BytesIO(content))
+        for info in archive.infolist():
+            with self.subTest(name=info.filename):
+                # Поле extra локального заголовка начинается с id zip64.
+                offset = info.header_offset + 30 + len(info.filename)
+                self.assertEqual(content[offset:offset + 2], b'\x01\x00')
+
+    def test_export_command(self):
+        """export_posts пишет группу с комментариями в stdout и в файл"""
+        out = StringIO()
+        call_command('export_posts', group='group', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([len(record['comments']) for record in records],
+                         [0, 2, 0])
+        path = os.path.join(TEMP_MEDIA_ROOT, 'export.zip')
+        call_command('export_posts', author='pavel', images=True,
+                     output=path)
+        self.assertIn('posts.jsonl', zipfile.ZipFile(path).namelist())
@@ -29,9 +29,9 @@ SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
              b'\x0A\x00\x3B')
 SMALL_GIF2 = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
               b'\x01\x00\x80\x00\x00\x00\x00\x00'
-              b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-              b'\x01\x00\x80\x00\x00\x00\x00\x00'
-              b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+              b'\x00\x00\xFF\x21\xF9\x04\x00\x00'
+              b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+              b'\x02\x00\x01\x00\x00\x02\x02\x0C'
               b'\x0A\x00\x3B')
 
 
@@ -123,7 +123,7 @@ class TaskCreateFormTests(TestCase):
     def test_edit_post_authorized(self):
         """Редактируется нужный пост авторизированным пользователя"""
         uploaded2 = SimpleUploadedFile(
-            name='small.gif',
+            name='small2.gif',
             content=SMALL_GIF2,
             content_type='image/gif'
         )
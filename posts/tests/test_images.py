@@ -0,0 +1,114 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.forms import PostForm
+from posts.models import Post, User
+
+NEW_POST_URL = reverse('new_post')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+
+
+def make_upload(name, size=(300, 200), image_format='JPEG', exif=None):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, (200, 30, 30))
+    options = {'exif': exif} if exif is not None else {}
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              f'image/{image_format.lower()}')
+
+
+def rotated_exif():
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    return exif.tobytes()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_DIMENSION=100)
+class ImageNormalizationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='pavel')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def form(self, upload):
+        return PostForm({'text': 'Текст'}, files={'image': upload})
+
+    def test_large_image_is_downscaled(self):
+        """Изображение уменьшается до IMAGE_MAX_DIMENSION по длинной стороне"""
+        form = self.form(make_upload('big.jpg'))
+        self.assertTrue(form.is_valid(), form.errors)
+        stored = Image.open(form.cleaned_data['image'])
+        self.assertEqual(stored.size, (100, 67))
+
+    def test_exif_is_stripped_and_applied(self):
+        """EXIF удаляется, а поворот из него применяется к пикселям"""
+        form = self.form(make_upload('photo.jpg', size=(80, 40),
+                                     exif=rotated_exif()))
+        self.assertTrue(form.is_valid(), form.errors)
+        stored = Image.open(form.cleaned_data['image'])
+        self.assertEqual(stored.size, (40, 80))
+        self.assertFalse(stored.getexif())
+        self.assertNotIn('exif', stored.info)
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000)
+    def test_pixel_limit(self):
+        """Слишком большой растр отклоняется до декодирования"""
+        form = self.form(make_upload('big.jpg'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=100)
+    def test_file_size_limit(self):
+        """Слишком тяжёлый файл отклоняется"""
+        form = self.form(make_upload('big.jpg'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_webp_variant_and_stats(self):
+        """Вместе с записью сохраняются WebP-вариант и статистика"""
+        upload = make_upload('big.png', image_format='PNG')
+        self.client.post(NEW_POST_URL, {'text': 'Текст', 'image': upload})
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, 'posts/big.png')
+        self.assertEqual(post.image_webp.name, 'posts/webp/big.webp')
+        self.assertEqual(Image.open(post.image_webp).format, 'WEBP')
+        stats = images.stats()
+        self.assertEqual(stats['uploads'], 1)
+        self.assertEqual(stats['bytes_in'], upload.size)
+        self.assertEqual(stats['bytes_out'], post.image.size)
+        self.assertGreater(stats['bytes_saved'], 0)
+
+    def test_edit_normalizes_new_image(self):
+        """При правке новое изображение проходит ту же обработку"""
+        post = Post.objects.create(text='Текст', author=self.user)
+        edit_url = reverse('post_edit', args=[self.user.username, post.pk])
+        with mock.patch('posts.views.schedule_on_commit') as schedule:
+            self.client.post(edit_url, {
+                'text': 'Текст',
+                'image': make_upload('edited.png', image_format='PNG')})
+        post.refresh_from_db()
+        self.assertEqual(Image.open(post.image).size, (100, 67))
+        self.assertEqual(post.image_webp.name, 'posts/webp/edited.webp')
+        schedule.assert_has_calls([mock.call(post.image),
+                                   mock.call(post.image_webp)])
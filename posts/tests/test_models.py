@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -50,3 +53,33 @@ class PostModelTest(TestCase):
         """Тест отображения __str__ для group"""
         title_group = self.group.title
         self.assertEqual(title_group, self.group.title)
+
+
+class CommentCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='testuser')
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+
+    def test_comment_count_follows_create_and_delete(self):
+        """comment_count меняется при создании и удалении комментария"""
+        comments = [Comment.objects.create(post=self.post, author=self.user,
+                                           text=f'Комментарий {number}')
+                    for number in range(3)]
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 3)
+        comments[0].delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+    def test_recount_comments_repairs_drift(self):
+        """Команда recount_comments исправляет разошедшийся счётчик"""
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Комментарий')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=42)
+        out = StringIO()
+        call_command('recount_comments', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertIn('1', out.getvalue())
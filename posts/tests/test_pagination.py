@@ -0,0 +1,156 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import counts
+from posts.models import Group, Post, User
+from posts.pagination import (NEXT, PREVIOUS, ApproximatePaginator,
+                              CursorPaginator, decode_cursor, encode_cursor,
+                              page_window)
+
+USERNAME = 'pavel'
+INDEX_URL = reverse('index')
+POSTS_COUNT = 25
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {number}', author=cls.author)
+            for number in range(POSTS_COUNT)
+        )
+        cls.guest_client = Client()
+
+    def test_cursor_pages_cover_all_posts_once(self):
+        """Листание курсором вперёд отдаёт все записи ровно один раз"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.page()
+        seen = list(page)
+        while page.has_next():
+            page = paginator.page(page.next_cursor())
+            seen.extend(page)
+        self.assertEqual(len(seen), POSTS_COUNT)
+        self.assertEqual(
+            [post.pk for post in seen],
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True)))
+
+    def test_previous_cursor_returns_same_page(self):
+        """Курсор «новее» возвращает ту же страницу, что была до шага"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor())
+        back = paginator.page(second.previous_cursor())
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_cursor_is_opaque_and_decodable(self):
+        """Курсор не содержит служебных символов и корректно декодируется"""
+        page = CursorPaginator(Post.objects.all(), 10).page()
+        token = page.next_cursor()
+        self.assertNotIn('|', token)
+        direction, value, pk = decode_cursor(token)
+        self.assertEqual(pk, page[-1].pk)
+        self.assertEqual(value, page[-1].pub_date)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Повреждённый курсор отдаёт первую страницу"""
+        response = self.guest_client.get(INDEX_URL, {'cursor': '!!!'})
+        self.assertEqual(len(response.context['page']), 10)
+        self.assertFalse(response.context['page'].has_previous())
+
+    def test_cursor_past_the_end_falls_back_to_first_page(self):
+        """Курсор за краем списка в любую сторону отдаёт первую страницу"""
+        oldest = Post.objects.order_by('pub_date', 'pk').first()
+        newest = Post.objects.order_by('-pub_date', '-pk').first()
+        first = CursorPaginator(Post.objects.all(), 10).page()
+        for cursor in (encode_cursor(NEXT, oldest.pub_date, oldest.pk),
+                       encode_cursor(PREVIOUS, newest.pub_date, newest.pk)):
+            with self.subTest(cursor=decode_cursor(cursor)[0]):
+                response = self.guest_client.get(INDEX_URL,
+                                                 {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                page = response.context['page']
+                self.assertEqual(list(page), list(first))
+                self.assertFalse(page.has_previous())
+                self.assertIsNone(page.previous_cursor())
+                self.assertEqual(page.next_cursor(), first.next_cursor())
+
+    def test_empty_page_has_no_cursors(self):
+        """Пустая страница не выдаёт курсоров и не падает"""
+        page = CursorPaginator(Post.objects.none(), 10).page()
+        self.assertEqual(len(page), 0)
+        self.assertIsNone(page.next_cursor())
+        self.assertIsNone(page.previous_cursor())
+
+    def test_views_use_numbered_pages_by_default(self):
+        """Без параметра cursor используется нумерованный Paginator"""
+        response = self.guest_client.get(INDEX_URL, {'page': 3})
+        self.assertIsInstance(response.context['paginator'], Paginator)
+        self.assertEqual(len(response.context['page']), 5)
+
+    def test_index_cursor_mode(self):
+        """Главная страница в keyset-режиме рендерит курсорную навигацию"""
+        response = self.guest_client.get(INDEX_URL, {'cursor': ''})
+        self.assertTrue(response.context['paginator'].is_cursor)
+        self.assertTemplateUsed(response, 'cursor_paginator.html')
+        self.assertContains(response,
+                            response.context['page'].next_cursor())
+
+
+class ApproximateCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Текст {number}', author=cls.author, group=cls.group)
+            for number in range(95))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_window(self):
+        """Окно страниц с пропусками вокруг текущей"""
+        self.assertEqual(page_window(1, 5), [1, 2, 3, 4, 5])
+        self.assertEqual(page_window(1, 50), [1, 2, 3, None, 50])
+        self.assertEqual(page_window(25, 50),
+                         [1, None, 23, 24, 25, 26, 27, None, 50])
+        self.assertEqual(page_window(4, 50), [1, 2, 3, 4, 5, 6, None, 50])
+
+    @override_settings(COUNT_CACHE_TTL=60)
+    def test_count_is_cached_and_refreshed_when_stale(self):
+        """Число берётся из кэша, устаревшее пересчитывается"""
+        posts = Post.objects.filter(group=self.group)
+        paginator = ApproximatePaginator(posts, 10)
+        self.assertEqual(paginator.count, 95)
+        Post.objects.create(text='Новая', author=self.author,
+                            group=self.group)
+        self.assertEqual(ApproximatePaginator(posts, 10).count, 95)
+        cache.set(counts._key(posts), (95, 0), None)
+        self.assertEqual(counts.approximate_count(posts), 96)
+
+    @override_settings(COUNT_CACHE_TTL=60)
+    def test_table_estimate_from_sqlite_stat(self):
+        """Без кэша число всей таблицы оценивается по sqlite_stat1"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.create(text='Новая', author=self.author)
+        with self.assertNumQueries(1):
+            self.assertEqual(counts.approximate_count(Post.objects.all()),
+                             95)
+
+    def test_group_page_links_are_windowed(self):
+        """Страница группы показывает окно номеров, а не все страницы"""
+        response = self.client.get(reverse('group', args=['group']),
+                                   {'page': 5})
+        self.assertContains(response, '&hellip;', count=1)
+        # 1, 2, 3, 4, 6, 7, 10 и ссылки «назад» и «вперёд».
+        self.assertContains(response, '?page=', count=9)
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.templatetags.post_cards import card_key
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+INDEX_URL = reverse('index')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.reader = User.objects.create(username='ivan')
+        cls.post = Post.objects.create(text='Текст записи', author=cls.author)
+        cls.edit_url = reverse('post_edit', args=['pavel', cls.post.pk])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_index(self, user=None):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client.get(INDEX_URL)
+
+    def test_card_is_cached_without_edit_button(self):
+        """Карточка кэшируется без кнопки, а кнопку видит только автор"""
+        self.assertContains(self.get_index(self.author), self.edit_url)
+        cached = cache.get(card_key(self.post))
+        self.assertIn('Текст записи', cached)
+        self.assertNotIn(self.edit_url, cached)
+        self.assertNotContains(self.get_index(self.reader), self.edit_url)
+
+    def test_cached_card_is_served(self):
+        """Повторный показ берёт карточку из кэша"""
+        self.get_index(self.reader)
+        cache.set(card_key(self.post), '<p>из кэша</p>')
+        self.assertContains(self.get_index(self.reader), '<p>из кэша</p>')
+
+    def test_page_cards_are_read_with_one_request(self):
+        """Карточки страницы читаются из кэша одним get_many"""
+        Post.objects.create(text='Вторая запись', author=self.reader)
+        with mock.patch('posts.templatetags.post_cards.cache',
+                        wraps=cache) as card_cache:
+            self.get_index(self.reader)
+            self.assertEqual(card_cache.get_many.call_count, 1)
+            self.assertEqual(card_cache.set_many.call_count, 1)
+            self.assertEqual(len(card_cache.set_many.call_args[0][0]), 2)
+            card_cache.reset_mock()
+            self.assertContains(self.get_index(self.author), self.edit_url)
+            self.assertEqual(card_cache.get_many.call_count, 1)
+            card_cache.get.assert_not_called()
+            card_cache.set_many.assert_not_called()
+
+    def test_edit_and_comment_change_key(self):
+        """Правка записи и новый комментарий меняют ключ карточки"""
+        key = card_key(self.post)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        self.post.refresh_from_db()
+        commented = card_key(self.post)
+        self.assertNotEqual(commented, key)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertNotEqual(card_key(self.post), commented)
+        self.assertContains(self.get_index(self.reader), 'Новый текст')
+
+    def test_card_with_pending_thumbnail_is_not_cached(self):
+        """Пока миниатюры нет, карточка не кэшируется"""
+        with override_settings(THUMBNAIL_GENERATE_INLINE=False,
+                               THUMBNAIL_ASYNC=False):
+            post = Post.objects.create(
+                text='С картинкой', author=self.author,
+                image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                         'image/gif'))
+            self.assertContains(self.get_index(), post.image.url)
+        self.assertIsNone(cache.get(card_key(post)))
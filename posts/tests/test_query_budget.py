@@ -0,0 +1,177 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.middleware import QueryBudgetExceeded, stats
+from posts.forms import PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.pagination import POSTS_PER_PAGE
+from posts.tests.test_images import make_upload
+
+USERNAME = 'pavel'
+GROUP_SLUG = 'testslug'
+INDEX_URL = reverse('index')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Обращения sorl-thumbnail к хранилищу ключей на карточку с
+# изображением при холодном кэше: исходный формат и WebP.
+THUMBNAIL_LOOKUPS_PER_CARD = 2
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username='reader')
+        group = Group.objects.create(title='Группа', slug=GROUP_SLUG,
+                                     description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(25):
+            cls.post = Post.objects.create(text=f'Текст {number}',
+                                           author=cls.author, group=group)
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_full_pages_fit_budget(self):
+        """Полные страницы укладываются в бюджет запросов"""
+        urls = [
+            INDEX_URL,
+            reverse('group', args=[GROUP_SLUG]),
+            reverse('profile', args=[USERNAME]),
+            reverse('post', args=[USERNAME, self.post.id]),
+            reverse('follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertEqual(
+                    self.authorized_client.get(url).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'index': 1})
+    def test_over_budget_fails_in_tests(self):
+        """Превышение бюджета роняет запрос в тестах"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.guest_client.get(INDEX_URL)
+
+    @override_settings(QUERY_BUDGETS={'index': 1},
+                       QUERY_BUDGET_STRICT=False, DEBUG=True)
+    def test_over_budget_logs_warning_in_debug(self):
+        """В DEBUG превышение бюджета пишется в лог"""
+        with self.assertLogs('posts.middleware', level='WARNING'):
+            response = self.guest_client.get(INDEX_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Server-Timing', response)
+
+    def test_stats_are_recorded_per_url_name(self):
+        """Статистика копится по имени URL"""
+        requests_before = stats.get('index', {}).get('requests', 0)
+        self.guest_client.get(INDEX_URL)
+        self.assertEqual(stats['index']['requests'], requests_before + 1)
+        self.assertGreater(stats['index']['queries'], 0)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageCardBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        for number in range(POSTS_PER_PAGE):
+            form = PostForm({'text': f'Текст {number}'},
+                            files={'image': make_upload(f'{number}.jpg')})
+            form.instance.author = cls.author
+            form.is_valid()
+            form.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_image_cards_fit_budget_with_thumbnail_lookups(self):
+        """Карточки с изображениями добавляют к бюджету только sorl"""
+        budgets = {
+            name: settings.QUERY_BUDGETS[name] +
+            THUMBNAIL_LOOKUPS_PER_CARD * POSTS_PER_PAGE
+            for name in ('index', 'profile')}
+        with override_settings(QUERY_BUDGETS=budgets):
+            for url in (INDEX_URL, reverse('profile', args=[USERNAME])):
+                with self.subTest(url=url):
+                    cache.clear()
+                    response = Client().get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertContains(response, '<img', POSTS_PER_PAGE)
+
+
+class FeedQueryCountTest(TestCase):
+    """Число запросов ленты не зависит от числа авторов и групп."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug=GROUP_SLUG)
+        cls.author = cls.add_posts(1)
+
+    @classmethod
+    def add_posts(cls, count):
+        for number in range(count):
+            author = User.objects.create(
+                username=f'author{User.objects.count()}')
+            group = Group.objects.create(title=f'Группа {author.pk}',
+                                         slug=f'group{author.pk}')
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(text='Текст', author=author, group=group)
+            Post.objects.create(text='Текст', author=author,
+                                group=cls.group)
+        return author
+
+    def count_queries(self, url):
+        cache.clear()
+        client = Client()
+        client.force_login(self.reader)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant_per_page(self):
+        """Лишние авторы и группы на странице не добавляют запросов"""
+        urls = {
+            'index': INDEX_URL,
+            'group': reverse('group', args=[GROUP_SLUG]),
+            'profile': reverse('profile', args=[self.author.username]),
+            'follow_index': reverse('follow_index'),
+            'api_posts': reverse('api_posts'),
+            'api_follow': reverse('api_follow'),
+        }
+        for url in urls.values():
+            # Первый заход создаёт строку AuthorStats автора профиля.
+            self.count_queries(url)
+        before = {name: self.count_queries(url)
+                  for name, url in urls.items()}
+        self.add_posts(4)
+        for name, url in urls.items():
+            with self.subTest(view=name):
+                self.assertEqual(self.count_queries(url), before[name])
+
+    def test_feed_skips_unused_columns(self):
+        """Лента не выбирает хэш пароля и лишние поля автора"""
+        with CaptureQueriesContext(connection) as queries:
+            Client().get(INDEX_URL)
+        feed = [query['sql'] for query in queries.captured_queries
+                if 'FROM "posts_post"' in query['sql']]
+        self.assertTrue(feed)
+        for sql in feed:
+            self.assertNotIn('"auth_user"."password"', sql)
@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME = 'pavel'
+GROUP_SLUG = 'testslug'
+LIST_URLS = {
+    'index': reverse('index'),
+    'group': reverse('group', args=[GROUP_SLUG]),
+    'profile': reverse('profile', args=[USERNAME]),
+    'follow_index': reverse('follow_index'),
+}
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username='reader')
+        group = Group.objects.create(title='Группа', slug=GROUP_SLUG,
+                                     description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(15):
+            post = Post.objects.create(text=f'Текст {number}',
+                                       author=cls.author, group=group)
+            Comment.objects.create(post=post, author=cls.reader,
+                                   text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_list_views_are_index_backed(self):
+        """Выборки записей в лентах идут по индексу без сортировки"""
+        for name, url in LIST_URLS.items():
+            with self.subTest(view=name):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                feed_queries = [
+                    query['sql'] for query in queries.captured_queries
+                    if query['sql'].startswith('SELECT') and
+                    'FROM "posts_post"' in query['sql'] and
+                    'ORDER BY' in query['sql']]
+                self.assertTrue(feed_queries)
+                for sql in feed_queries:
+                    plan = query_plan(sql)
+                    self.assertNotIn('TEMP B-TREE', plan, plan)
+                    self.assertIn('INDEX', plan, plan)
+
+    def test_follow_index_cursor_uses_timeline_index(self):
+        """Курсорные страницы ленты подписок идут по индексу ленты"""
+        url = LIST_URLS['follow_index']
+        page = self.client.get(url, {'cursor': ''}).context['page']
+        cursors = ['', page.next_cursor()]
+        page = self.client.get(url, {'cursor': cursors[1]}).context['page']
+        self.assertEqual([post.text for post in page],
+                         [f'Текст {number}' for number in range(4, -1, -1)])
+        cursors.append(page.previous_cursor())
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url, {'cursor': cursor})
+                feed_queries = [
+                    query['sql'] for query in queries.captured_queries
+                    if 'FROM "posts_post"' in query['sql'] and
+                    'ORDER BY' in query['sql']]
+                self.assertTrue(feed_queries)
+                for sql in feed_queries:
+                    plan = query_plan(sql)
+                    self.assertIn('posts_timeline_user_date', plan, plan)
+                    self.assertNotIn('TEMP B-TREE', plan, plan)
+
+    def test_comment_thread_is_index_backed(self):
+        """Ветка комментариев читается по индексу (post, created)"""
+        post = Post.objects.first()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('post', args=[USERNAME, post.pk]))
+        thread = [query['sql'] for query in queries.captured_queries
+                  if 'FROM "posts_comment"' in query['sql'] and
+                  'ORDER BY' in query['sql']]
+        self.assertTrue(thread)
+        for sql in thread:
+            plan = query_plan(sql)
+            self.assertIn('posts_comment_post_created', plan, plan)
+
+    def test_admin_comment_list_is_index_backed(self):
+        """Список комментариев в админке читается по индексу created"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:posts_comment_changelist'))
+        listing = [query['sql'] for query in queries.captured_queries
+                   if 'FROM "posts_comment"' in query['sql'] and
+                   'ORDER BY' in query['sql']]
+        self.assertTrue(listing)
+        for sql in listing:
+            plan = query_plan(sql)
+            self.assertIn('posts_comment_created', plan, plan)
+
+    def test_follow_is_unique(self):
+        """Повторная подписка не создаёт дубликат"""
+        self.client.get(reverse('profile_follow', args=[USERNAME]))
+        self.client.get(reverse('profile_follow', args=[USERNAME]))
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 1)
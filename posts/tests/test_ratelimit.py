@@ -0,0 +1,97 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import ratelimit
+from posts.models import Post, User
+
+NEW_POST_URL = reverse('new_post')
+SIGNUP_URL = reverse('signup')
+LIMITS = {'new_post': '2/m', 'signup': '1/h'}
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS=LIMITS)
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='pavel')
+        cls.other = User.objects.create(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def hit_at(self, seconds, rate='2/m'):
+        with mock.patch('posts.ratelimit.time.time', return_value=seconds):
+            return ratelimit.hit('test', 'client', rate)
+
+    def test_parse_rate(self):
+        """Ограничение задаётся числом запросов за период"""
+        self.assertEqual(ratelimit.parse_rate('10/m'), (10, 60))
+        self.assertEqual(ratelimit.parse_rate('5/h'), (5, 3600))
+
+    def test_bucket_allows_burst_then_refills(self):
+        """Корзина пропускает всплеск и пополняется со временем"""
+        self.assertEqual(self.hit_at(1000), 0)
+        self.assertEqual(self.hit_at(1000), 0)
+        self.assertEqual(self.hit_at(1000), 30)
+        self.assertEqual(self.hit_at(1020), 10)
+        self.assertEqual(self.hit_at(1030), 0)
+        self.assertEqual(self.hit_at(1030), 30)
+
+    def test_idle_client_does_not_bank_tokens(self):
+        """После простоя доступно не больше ёмкости корзины"""
+        self.assertEqual(self.hit_at(1000), 0)
+        for _ in range(2):
+            self.assertEqual(self.hit_at(5000), 0)
+        self.assertEqual(self.hit_at(5000), 30)
+
+    def test_bucket_expires_after_period(self):
+        """Ключ корзины живёт период после последнего запроса"""
+        with mock.patch.object(cache, 'touch', wraps=cache.touch) as touch:
+            self.hit_at(1000)
+            self.hit_at(1000)
+        touch.assert_called_with('ratelimit:test:client', 60)
+        self.assertEqual(touch.call_count, 2)
+
+    def test_view_returns_429_with_retry_after(self):
+        """Сверх лимита view отвечает 429 с заголовком Retry-After"""
+        for _ in range(2):
+            self.client.post(NEW_POST_URL, {'text': 'Запись'})
+        response = self.client.post(NEW_POST_URL, {'text': 'Лишняя'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(self.client.get(NEW_POST_URL).status_code, 200)
+
+    def test_limits_are_per_user(self):
+        """Лимит одного пользователя не затрагивает другого"""
+        for _ in range(3):
+            self.client.post(NEW_POST_URL, {'text': 'Запись'})
+        other = Client()
+        other.force_login(self.other)
+        response = other.post(NEW_POST_URL, {'text': 'Запись'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_signup_is_limited_by_ip(self):
+        """Регистрация ограничивается по IP-адресу"""
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client.post(SIGNUP_URL, {}).status_code, 200)
+        self.assertEqual(client.post(SIGNUP_URL, {}).status_code, 429)
+        response = Client(REMOTE_ADDR='10.0.0.2').post(SIGNUP_URL, {})
+        self.assertEqual(response.status_code, 200)
+
+    def test_throttled_requests_are_counted(self):
+        """Отклонённые запросы считаются по областям"""
+        for _ in range(4):
+            self.client.post(NEW_POST_URL, {'text': 'Запись'})
+        self.assertEqual(ratelimit.stats(), {'new_post': 2, 'signup': 0})
+        out = StringIO()
+        call_command('ratelimit_stats', reset=True, stdout=out)
+        self.assertIn('new_post: отклонено 2', out.getvalue())
+        self.assertEqual(ratelimit.stats()['new_post'], 0)
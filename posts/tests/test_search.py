@@ -0,0 +1,82 @@
+from django.contrib.admin.sites import site
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.search import search_posts
+
+SEARCH_URL = reverse('search')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='pavel')
+        cls.other = User.objects.create(username='ivan')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.rare = Post.objects.create(
+            text='Про джанго и немного про кэш', author=cls.author)
+        cls.frequent = Post.objects.create(
+            text='Джанго, джанго и ещё раз Джанго', author=cls.other,
+            group=cls.group)
+        cls.unrelated = Post.objects.create(
+            text='Совсем о другом', author=cls.author)
+
+    def search(self, query, **params):
+        return Client().get(SEARCH_URL, {'q': query, **params})
+
+    def test_results_are_ranked(self):
+        """Более релевантная запись идёт первой"""
+        response = self.search('джанго')
+        self.assertEqual(list(response.context['page']),
+                         [self.frequent, self.rare])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении записи"""
+        self.unrelated.text = 'Теперь и тут джанго'
+        self.unrelated.save()
+        self.assertIn(self.unrelated, search_posts('джанго'))
+        self.unrelated.delete()
+        self.assertEqual(search_posts('джанго').count(), 2)
+
+    def test_prefix_and_filters(self):
+        """Поиск по префиксу слова с фильтрами по группе и автору"""
+        self.assertEqual(list(search_posts('джан', group='group')),
+                         [self.frequent])
+        self.assertEqual(list(search_posts('джан', author='pavel')),
+                         [self.rare])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Совпадения подсвечиваются, а остальной текст экранируется"""
+        Post.objects.create(text='<script>кэш</script>', author=self.author)
+        response = self.search('кэш')
+        self.assertContains(response, '&lt;script&gt;<mark>кэш</mark>')
+        self.assertNotContains(response, '<script>кэш')
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Операторы FTS5 в запросе не ломают поиск"""
+        response = self.search('"джанго*" ^(')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page']), 2)
+
+    def test_cursor_pagination(self):
+        """Курсор листает результаты в порядке релевантности"""
+        Post.objects.bulk_create(
+            Post(text=f'джанго {"слово " * number}', author=self.author)
+            for number in range(15))
+        first = self.search('джанго').context['page']
+        second = self.search('джанго',
+                             cursor=first.next_cursor()).context['page']
+        self.assertEqual(len(first) + len(second), 17)
+        self.assertFalse(set(first) & set(second))
+        self.assertGreaterEqual(first[-1].score, second[0].score)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит записи через FTS-индекс"""
+        admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, distinct = admin.get_search_results(
+            request, Post.objects.all(), 'джанго')
+        self.assertEqual(set(queryset), {self.rare, self.frequent})
+        self.assertFalse(distinct)
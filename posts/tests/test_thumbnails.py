@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post, User
+from tasks import queue
+from tasks.models import Task
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+INDEX_URL = reverse('index')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeferredThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=User.objects.create(username='pavel'),
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def thumbnail(self):
+        geometry, options = thumbnails.THUMBNAIL_SIZES[0]
+        return get_thumbnail(self.post.image, geometry, **options)
+
+    def test_template_does_not_generate_inline(self):
+        """Без готовой миниатюры шаблон отдаёт исходное изображение"""
+        response = Client().get(INDEX_URL)
+        self.assertContains(response, self.post.image.url)
+        self.assertEqual(self.thumbnail().name, self.post.image.name)
+
+    def test_scheduled_thumbnail_is_served(self):
+        """После генерации шаблон отдаёт миниатюру из хранилища ключей"""
+        thumbnails.schedule(self.post.image.name)
+        thumbnail = self.thumbnail()
+        self.assertNotEqual(thumbnail.name, self.post.image.name)
+        self.assertTrue(thumbnail.exists())
+        self.assertContains(Client().get(INDEX_URL), thumbnail.url)
+
+    @override_settings(THUMBNAIL_ASYNC=True, TASKS_EAGER=False)
+    def test_async_schedule_goes_through_task_queue(self):
+        """В рабочем режиме генерация ставится в очередь задач"""
+        thumbnails.schedule(self.post.image.name)
+        task = Task.objects.get()
+        self.assertEqual(task.key, f'thumbnail:{self.post.image.name}')
+        self.assertEqual(self.thumbnail().name, self.post.image.name)
+        self.assertTrue(queue.execute(queue.claim(1)[0]))
+        self.assertNotEqual(self.thumbnail().name, self.post.image.name)
+
+    def test_schedule_skips_already_queued_files(self):
+        """Повторная постановка того же файла в очередь игнорируется"""
+        thumbnails.schedule(self.post.image.name)
+        self.assertFalse(cache.add(
+            f'thumbnail:queued:{self.post.image.name}', True))
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+from tasks.models import Task
+
+FOLLOW_INDEX_URL = reverse('follow_index')
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.old_post = Post.objects.create(text='Старая запись',
+                                           author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        return list(self.client.get(FOLLOW_INDEX_URL).context['page'])
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        """Подписка заполняет ленту, новая запись попадает в неё сразу"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новая запись', author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_trims_timeline(self):
+        """Отписка удаляет записи автора из ленты"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled_on_read(self):
+        """Записи популярного автора не раскладываются, а читаются pull"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новая запись', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+
+@override_settings(TIMELINE_FANOUT_LIMIT=2)
+class CelebrityTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.readers = [User.objects.create(username=f'reader{number}')
+                        for number in range(2)]
+
+    def follow_all(self):
+        return [Follow.objects.create(user=reader, author=self.author)
+                for reader in self.readers]
+
+    def test_status_follows_committed_follows(self):
+        """Набор популярных авторов строится по базе после каждой смены"""
+        self.assertEqual(timeline.celebrity_ids(), set())
+        follows = self.follow_all()
+        self.assertEqual(timeline.celebrity_ids(), {self.author.pk})
+        follows[0].delete()
+        self.assertEqual(timeline.celebrity_ids(), set())
+
+    def test_backfill_after_dropping_below_limit(self):
+        """Записи бывшего популярного автора раскладываются задачей"""
+        follows = self.follow_all()
+        post = Post.objects.create(text='Запись', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        follows[0].delete()
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.readers[1].pk, post.pk)])
+
+    @override_settings(TASKS_EAGER=False)
+    def test_backfill_is_queued(self):
+        """Раскладка ставится в очередь задач, а не идёт в запросе"""
+        follows = self.follow_all()
+        Post.objects.create(text='Запись', author=self.author)
+        follows[0].delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'posts.timeline.backfill_followers')
+        self.assertEqual(task.key, f'timeline:backfill:{self.author.pk}')
@@ -2,12 +2,14 @@ import shutil
 import tempfile
 
 from django.conf import settings
+from django.core import mail
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
 
 GROUP1_TITLE = 'testgroup'
 GROUP1_DESCRIPTION = 'testdesc'
@@ -131,26 +133,20 @@ class PostViewsTest(TestCase):
         self.assertEqual(len(response.context['page']), 4)
 
     def test_index_page_uses_cache(self):
-        """Главная страница использует кэш."""
+        """Главная страница отдаётся из кэша, пока записи не менялись."""
+        cache.clear()
         response_before = self.guest_client.get(INDEX_URL)
-        self.test_cache_post = Post.objects.create(
+        response_cached = self.guest_client.get(INDEX_URL)
+        self.assertIsNone(response_cached.context)
+        self.assertEqual(response_before.content, response_cached.content)
+        Post.objects.create(
             text='Пост для теста кэша',
             author=self.user,
             group=self.group
         )
         response_after = self.guest_client.get(INDEX_URL)
-        self.assertEqual(
-            response_before.content,
-            response_after.content
-        )
-        cache.clear()
-        response_after_clear = self.guest_client.get(
-            INDEX_URL
-        )
-        self.assertNotEqual(
-            response_after.content,
-            response_after_clear.content
-        )
+        self.assertNotEqual(response_cached.content, response_after.content)
+        self.assertContains(response_after, 'Пост для теста кэша')
 
     def test_new_post_not_exists_unsubscribed_person(self):
         """Тестирование того, что новая запись пользователя
@@ -185,3 +181,64 @@ class PostViewsTest(TestCase):
             Follow.objects.filter(
                 author=self.post.author,
                 user=self.author_testuser).exists())
+
+
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+        other = Post.objects.create(text='Другая', author=cls.author)
+        Comment.objects.create(post=other, author=cls.author,
+                               text='Чужой комментарий')
+        for number in range(25):
+            Comment.objects.create(post=cls.post, author=cls.author,
+                                   text=f'Комментарий {number}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_post_page_shows_newest_comments_of_the_post(self):
+        """На странице записи только её комментарии, новые первыми"""
+        response = self.client.get(
+            reverse('post', args=[USERNAME, self.post.pk]))
+        texts = [comment.text for comment in response.context['comments']]
+        self.assertEqual(texts, [f'Комментарий {number}'
+                                 for number in range(24, 4, -1)])
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertContains(response, 'js-more-comments')
+
+    def test_load_more_fragment(self):
+        """Фрагмент «показать ещё» отдаёт оставшиеся комментарии"""
+        cursor = self.client.get(
+            reverse('post', args=[USERNAME, self.post.pk])
+        ).context['next_cursor']
+        response = self.client.get(
+            reverse('post_comments', args=[USERNAME, self.post.pk]),
+            {'cursor': cursor})
+        self.assertTemplateUsed(response, 'comment_list.html')
+        texts = [comment.text for comment in response.context['comments']]
+        self.assertEqual(texts, [f'Комментарий {number}'
+                                 for number in range(4, -1, -1)])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertNotContains(response, 'js-more-comments')
+
+
+class CommentNotificationTest(TransactionTestCase):
+    def test_comment_notifies_post_author(self):
+        """Автор записи получает письмо о чужом комментарии"""
+        author = User.objects.create(username='pavel',
+                                     email='pavel@example.com')
+        reader = User.objects.create(username='reader')
+        post = Post.objects.create(text='Запись', author=author)
+        url = reverse('add_comment', args=['pavel', post.pk])
+        self.client.force_login(author)
+        self.client.post(url, {'text': 'Свой комментарий'})
+        self.assertEqual(mail.outbox, [])
+        self.client.force_login(reader)
+        self.client.post(url, {'text': 'Отличная запись'})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['pavel@example.com'])
+        self.assertIn('Отличная запись', mail.outbox[0].body)
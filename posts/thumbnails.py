@@ -0,0 +1,120 @@
+"""Фоновая подготовка миниатюр sorl-thumbnail.
+
+Шаблоны не должны декодировать и масштабировать картинки внутри запроса.
+DeferredThumbnailBackend отдаёт готовую миниатюру из хранилища ключей
+sorl, а если её ещё нет — ставит генерацию в очередь задач (tasks) и
+возвращает исходное изображение.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from tasks.queue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# Все размеры, которые запрашивают шаблоны (см. post_item.html).
+THUMBNAIL_SIZES = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Сколько секунд не обращаться к очереди повторно за тем же файлом.
+QUEUED_TIMEOUT = 60
+
+_executor = None
+
+
+def _initialize_worker():
+    django.setup()
+
+
+def get_executor(max_workers=None):
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers or settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_initialize_worker)
+    return _executor
+
+
+@task(priority=10)
+def generate(name):
+    """Создаёт все миниатюры файла для размеров из THUMBNAIL_SIZES.
+
+    WebP-варианты изображений (см. posts.images) и уменьшаются в WebP.
+    """
+    backend = ThumbnailBackend()
+    for geometry, options in THUMBNAIL_SIZES:
+        if name.endswith('.webp'):
+            options = dict(options, format='WEBP')
+        backend.get_thumbnail(name, geometry, **options)
+    return name
+
+
+def generate_in_worker(name):
+    """Точка входа для процесса пула."""
+    try:
+        return generate(name)
+    finally:
+        close_old_connections()
+
+
+def schedule(name):
+    """Ставит генерацию миниатюр в очередь, не дублируя задачи."""
+    if not name or not cache.add(f'thumbnail:queued:{name}', True,
+                                 QUEUED_TIMEOUT):
+        return
+    if not settings.THUMBNAIL_ASYNC:
+        # Ошибка миниатюры не должна ронять запрос, сохранивший запись.
+        try:
+            generate(name)
+        except Exception:
+            logger.exception('Не удалось создать миниатюры для %s', name)
+        return
+    enqueue(generate, name, key=f'thumbnail:{name}')
+
+
+def schedule_on_commit(image):
+    """Ставит миниатюры загруженного изображения после фиксации записи."""
+    if image:
+        transaction.on_commit(lambda: schedule(image.name))
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не генерирует миниатюры внутри запроса."""
+
+    def _prepare_options(self, source, options):
+        # Те же умолчания, что и в ThumbnailBackend.get_thumbnail, чтобы
+        # имя миниатюры совпадало с созданной в пуле.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if settings.THUMBNAIL_GENERATE_INLINE or not file_:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        source = ImageFile(file_)
+        options = self._prepare_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        cached = default.kvstore.get(ImageFile(name, default.storage))
+        if cached:
+            return cached
+        if settings.THUMBNAIL_ASYNC:
+            schedule(source.name)
+        return source
@@ -0,0 +1,170 @@
+"""Материализованные ленты подписок (fan-out on write).
+
+При публикации запись раскладывается в TimelineEntry каждого подписчика
+автора, поэтому лента подписок читается одним диапазоном по индексу
+(user, -pub_date). Авторы, у которых подписчиков не меньше
+TIMELINE_FANOUT_LIMIT, при публикации не раскладываются: их записи
+подтягиваются в ленту при чтении (pull on read).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+
+from tasks.queue import enqueue_on_commit, task
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+# Набор популярных авторов строится заново не реже этого срока: так
+# ограничено время жизни набора, собранного по ещё не зафиксированным
+# данным.
+CELEBRITIES_TIMEOUT = 60 * 10
+# Поля ленты подписок для курсорной паджинации (см. feed_for).
+FEED_DATE = 'feed_date'
+FEED_PK = 'feed_pk'
+
+
+def _celebrities_key():
+    return f'timeline:celebrities:{settings.TIMELINE_FANOUT_LIMIT}'
+
+
+def celebrity_ids():
+    """id авторов, чьи записи читаются из ленты через pull."""
+    ids = cache.get(_celebrities_key())
+    if ids is None:
+        ids = set(Follow.objects.order_by().values('author')
+                  .annotate(followers=Count('pk'))
+                  .filter(followers__gte=settings.TIMELINE_FANOUT_LIMIT)
+                  .values_list('author', flat=True))
+        cache.add(_celebrities_key(), ids, CELEBRITIES_TIMEOUT)
+    return ids
+
+
+def refresh_celebrity(author_id):
+    """Пересчитывает статус автора после подписки или отписки.
+
+    Набор в кэше не правится на месте: get и set двух одновременных
+    подписок затёрли бы изменения друг друга. Он сбрасывается сразу и
+    ещё раз после фиксации и строится заново по базе.
+    """
+    followers = Follow.objects.filter(author_id=author_id).count()
+    is_celebrity = followers >= settings.TIMELINE_FANOUT_LIMIT
+    if (author_id in celebrity_ids()) == is_celebrity:
+        return
+    reset_celebrities()
+    transaction.on_commit(reset_celebrities)
+    if not is_celebrity:
+        enqueue_on_commit(backfill_followers, author_id,
+                          key=f'timeline:backfill:{author_id}')
+
+
+@task()
+def backfill_followers(author_id):
+    """Раскладывает записи автора по лентам всех его подписчиков.
+
+    Пока автор читался через pull, его новые записи не попадали в
+    ленты, поэтому после выхода из популярных их нужно разложить.
+    """
+    fan_out_posts(Post.objects.filter(author_id=author_id))
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE,
+                                      ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Раскладывает новую запись в ленты подписчиков автора."""
+    if post.author_id in celebrity_ids():
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True)
+    _bulk_insert([TimelineEntry(user_id=user_id, post_id=post.pk,
+                                pub_date=post.pub_date)
+                  for user_id in followers.iterator()])
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту пользователя записи автора после подписки."""
+    if author_id in celebrity_ids():
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date')
+    _bulk_insert([TimelineEntry(user_id=user_id, post_id=pk,
+                                pub_date=pub_date)
+                  for pk, pub_date in posts.iterator()])
+
+
+def _insert_select(rows):
+    """INSERT ... SELECT в TimelineEntry из values_list(user, post, date).
+
+    Строки вставляются внутри СУБД, без построчной передачи через Python.
+    """
+    select_sql, params = rows.query.sql_with_params()
+    meta = TimelineEntry._meta
+    columns = ', '.join(
+        connection.ops.quote_name(meta.get_field(name).column)
+        for name in ('user', 'post', 'pub_date'))
+    sql = (f'{connection.ops.insert_statement(ignore_conflicts=True)} '
+           f'{connection.ops.quote_name(meta.db_table)} ({columns}) '
+           f'{select_sql} '
+           f'{connection.ops.ignore_conflicts_suffix_sql(True)}')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def backfill_follows(follows):
+    """Заполняет ленты сразу для многих подписок (после bulk_create)."""
+    _insert_select(Post.objects.filter(author__following__in=follows)
+                   .exclude(author_id__in=celebrity_ids())
+                   .order_by()
+                   .values_list('author__following__user_id', 'pk',
+                                'pub_date'))
+
+
+def fan_out_posts(posts):
+    """Раскладывает по лентам сразу много записей (после bulk_create)."""
+    _insert_select(posts.filter(author__following__isnull=False)
+                   .exclude(author_id__in=celebrity_ids())
+                   .order_by()
+                   .values_list('author__following__user_id', 'pk',
+                                'pub_date'))
+
+
+def reset_celebrities():
+    """Сбрасывает кэш популярных авторов после массовых подписок."""
+    cache.delete(_celebrities_key())
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты пользователя записи автора после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id,
+                                 post__author_id=author_id).delete()
+
+
+def feed_for(user):
+    """QuerySet записей ленты подписок пользователя.
+
+    Записи отсортированы от новых к старым по аннотациям FEED_DATE и
+    FEED_PK. Когда лента читается из TimelineEntry, это её колонки
+    pub_date и post_id, и сортировка, как и условие курсора, идёт по
+    индексу (user, -pub_date, -post) без сортировки во временном
+    B-дереве.
+    """
+    celebrities = celebrity_ids()
+    pulled = set()
+    if celebrities:
+        pulled = celebrities.intersection(
+            Follow.objects.filter(user=user).values_list('author_id',
+                                                         flat=True))
+    if not pulled:
+        posts = Post.objects.filter(timeline_entries__user=user).annotate(
+            **{FEED_DATE: F('timeline_entries__pub_date'),
+               FEED_PK: F('timeline_entries__post')})
+    else:
+        entries = TimelineEntry.objects.filter(user=user).values('post_id')
+        posts = Post.objects.filter(
+            Q(pk__in=entries) | Q(author_id__in=pulled)).annotate(
+            **{FEED_DATE: F('pub_date'), FEED_PK: F('pk')})
+    return posts.order_by(f'-{FEED_DATE}', f'-{FEED_PK}')
@@ -1,8 +1,19 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post'),
+    path('api/posts/<int:post_id>/comments/', api.post_comments,
+         name='api_post_comments'),
+    path('api/groups/', api.groups, name='api_groups'),
+    path('api/groups/<slug:slug>/posts/', api.group_posts,
+         name='api_group_posts'),
+    path('api/profiles/<str:username>/', api.profile, name='api_profile'),
+    path('api/profiles/<str:username>/posts/', api.profile_posts,
+         name='api_profile_posts'),
+    path('api/follow/', api.follow_feed, name='api_follow'),
     path("follow/", views.follow_index, name="follow_index"),
     path("<str:username>/follow/", views.profile_follow,
          name="profile_follow"),
@@ -10,11 +21,18 @@ urlpatterns = [
          name="profile_unfollow"),
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path('group/<slug:slug>/export/', views.export_group,
+         name='export_group'),
     path('new', views.new_post, name='new_post'),
+    path('search/', views.search, name='search'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/export/', views.export_profile,
+         name='export_profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit,
          name='post_edit'),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path("<username>/<int:post_id>/comment/", views.add_comment,
          name="add_comment"),
     ]
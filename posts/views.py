@@ -1,26 +1,40 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-
+from tasks.queue import enqueue_on_commit
 
+from . import export
+from .cache import (FEED_SCOPE, anonymous_page_cache, author_scope,
+                    group_scope, post_scope)
+from .conditional import scoped_etag
+from .feeds import feed_queryset
+from .forms import CommentForm, PostForm
+from .models import Comment, Follow, Group, Post, User
+from .pagination import (COMMENTS_PER_PAGE, CURSOR_PARAM, POSTS_PER_PAGE,
+                         CursorPaginator, paginate)
+from .ratelimit import ratelimit
+from .search import SearchPaginator, attach_snippets, search_posts
+from .stats import author_stats
+from .tasks import notify_post_author
+from .thumbnails import schedule_on_commit
+from .timeline import FEED_DATE, FEED_PK, feed_for
+
+
+@anonymous_page_cache(FEED_SCOPE)
 def index(request):
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, feed_queryset())
     return render(request, 'index.html', {'page': page,
                                           'paginator': paginator})
 
 
+@condition(etag_func=scoped_etag(group_scope('{slug}')))
+@anonymous_page_cache(group_scope('{slug}'))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, feed_queryset(group.posts.all()))
     context = {
         'group': group,
         'page': page,
@@ -29,7 +43,32 @@ def group_posts(request, slug):
     return render(request, 'group.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = request.GET.get('group', '')
+    author = request.GET.get('author', '').strip()
+    paginator = SearchPaginator(search_posts(query, group, author),
+                                POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get(CURSOR_PARAM))
+    attach_snippets(page.object_list, query)
+    params = request.GET.copy()
+    params.pop(CURSOR_PARAM, None)
+    params.pop('page', None)
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.order_by('title').values_list('slug',
+                                                              'title'),
+        'page': page,
+        'paginator': paginator,
+        'query_string': f'{params.urlencode()}&' if params else '',
+    }
+    return render(request, 'search.html', context)
+
+
 @login_required
+@ratelimit('new_post')
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
@@ -37,21 +76,23 @@ def new_post(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    schedule_on_commit(post.image)
+    schedule_on_commit(post.image_webp)
     return redirect('index')
 
 
+@condition(etag_func=scoped_etag(author_scope('{username}')))
+@anonymous_page_cache(author_scope('{username}'))
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    profile_posts = author.posts.all()
-    paginator = Paginator(profile_posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, feed_queryset(author.posts.all()))
     following = (request.user.is_authenticated and
                  request.user != author and
                  Follow.objects.filter(user=request.user,
                                        author=author).exists())
     context = {
         'author': author,
+        'stats': author_stats(author.pk),
         'page': page,
         'paginator': paginator,
         'following': following,
@@ -59,29 +100,57 @@ def profile(request, username):
     return render(request, 'profile.html', context)
 
 
+@condition(etag_func=scoped_etag(post_scope('{post_id}'),
+                                 author_scope('{username}')))
+@anonymous_page_cache(post_scope('{post_id}'), author_scope('{username}'))
 def post_view(request, username, post_id):
     form = CommentForm()
     post = get_object_or_404(Post,
                              author__username=username,
                              pk=post_id)
-    comments = post.author.comments.all()
+    comments, next_cursor = comment_thread(request, post)
     context = {
         'post': post,
         'author': post.author,
+        'stats': author_stats(post.author_id),
         'comments': comments,
+        'next_cursor': next_cursor,
         'form': form,
     }
     return render(request, 'post.html', context)
 
 
+def comment_thread(request, post):
+    """Порция комментариев записи от новых к старым и курсор следующей."""
+    paginator = CursorPaginator(post.comments.select_related('author'),
+                                COMMENTS_PER_PAGE, ordering_field='created')
+    return paginator.more(request.GET.get(CURSOR_PARAM))
+
+
+@anonymous_page_cache(post_scope('{post_id}'), author_scope('{username}'))
+def post_comments(request, username, post_id):
+    """Фрагмент «показать ещё» с продолжением ветки комментариев."""
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             author__username=username, pk=post_id)
+    comments, next_cursor = comment_thread(request, post)
+    return render(request, 'comment_list.html', {
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
     if request.user != post.author:
         return redirect('post', username=username, post_id=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save()
+        schedule_on_commit(post.image)
+        schedule_on_commit(post.image_webp)
         return redirect('post', username=username, post_id=post_id)
     return render(request, 'new_post.html', {'form': form,
                                              'post': post,
@@ -89,6 +158,7 @@ def post_edit(request, username, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, username, post_id):
     form = CommentForm(request.POST)
     if not form.is_valid():
@@ -97,6 +167,8 @@ def add_comment(request, username, post_id):
     comment.author = request.user
     comment.post = Post.objects.get(id=post_id)
     form.save()
+    enqueue_on_commit(notify_post_author, comment.pk,
+                      key=f'comment:{comment.pk}')
     return redirect("post", username=username, post_id=post_id)
 
 
@@ -110,10 +182,9 @@ def server_error(request):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request,
+                               feed_queryset(feed_for(request.user)),
+                               ordering_field=FEED_DATE, pk_field=FEED_PK)
     return render(
         request, 'follow.html',
         {
@@ -123,11 +194,11 @@ def follow_index(request):
 
 
 @login_required
+@ratelimit('profile_follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    follow_check = Follow.objects.filter(author=author, user=request.user)
-    if author != request.user and not follow_check.exists():
-        Follow.objects.create(user=request.user, author=author)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('profile', username=username)
 
 
@@ -137,3 +208,32 @@ def profile_unfollow(request, username):
                       user=request.user,
                       author__username=username).delete()
     return redirect('profile', username=username)
+
+
+def export_response(request, posts, filename, comments=None):
+    export_format = request.GET.get('format', 'jsonl')
+    if export_format not in export.FORMATS:
+        export_format = 'jsonl'
+    content, content_type, extension = export.stream(
+        posts, export_format, comments, images='images' in request.GET)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{extension}"')
+    return response
+
+
+@login_required
+def export_profile(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(request, author.posts.all(), username)
+
+
+@login_required
+def export_group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(request, group.posts.all(), slug,
+                           Comment.objects.filter(post__group=group))
@@ -0,0 +1,112 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks import queue
+
+logger = logging.getLogger(__name__)
+
+# Как часто удалять старые выполненные задачи, в секундах.
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = ('Выполняет задачи из очереди в пуле процессов: по приоритету, '
+            'с повторами при ошибках.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.TASKS_WORKERS,
+                            help='Число процессов; 0 — в текущем процессе.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Завершиться, когда готовых задач не '
+                                 'останется.')
+        parser.add_argument('--poll', type=float,
+                            default=settings.TASKS_POLL_INTERVAL,
+                            help='Пауза между опросами пустой очереди, с.')
+
+    def handle(self, *args, **options):
+        self.done = self.failed = 0
+        self.purged_at = 0
+        try:
+            if options['workers'] == 0:
+                self.run_inline(options['burst'], options['poll'])
+            else:
+                self.run_pool(options['workers'], options['burst'],
+                              options['poll'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Выполнено задач: {self.done}, '
+                          f'с ошибкой: {self.failed}')
+
+    def housekeeping(self):
+        queue.recover()
+        if time.monotonic() - self.purged_at > PURGE_INTERVAL:
+            queue.purge()
+            self.purged_at = time.monotonic()
+
+    def record(self, succeeded):
+        if succeeded:
+            self.done += 1
+        else:
+            self.failed += 1
+
+    def run_inline(self, burst, poll):
+        while True:
+            self.housekeeping()
+            claimed = queue.claim(1)
+            if not claimed:
+                if burst:
+                    return
+                time.sleep(poll)
+                continue
+            self.record(queue.execute(claimed[0]))
+
+    def create_executor(self, workers):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup)
+
+    def run_pool(self, workers, burst, poll):
+        executor = self.create_executor(workers)
+        running = {}
+        try:
+            while True:
+                self.housekeeping()
+                for pk in queue.claim(workers - len(running)):
+                    future = executor.submit(queue.execute_in_worker, pk)
+                    running[future] = pk
+                if not running:
+                    if burst:
+                        return
+                    time.sleep(poll)
+                    continue
+                finished, _ = wait(running, timeout=poll,
+                                   return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    pk = running.pop(future)
+                    if future.exception() is None:
+                        self.record(future.result())
+                        continue
+                    # Задача останется в статусе running и вернётся в
+                    # очередь через recover.
+                    logger.error('Воркер упал на задаче %s: %s', pk,
+                                 future.exception())
+                    self.record(False)
+                    broken |= isinstance(future.exception(),
+                                         BrokenProcessPool)
+                if broken:
+                    # Остальные задачи сломанного пула тоже вернёт recover.
+                    running.clear()
+                    executor.shutdown(wait=False)
+                    executor = self.create_executor(workers)
+        finally:
+            executor.shutdown()
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from tasks import queue
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Показывает глубину очереди задач и задержки выполнения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=3600,
+                            help='За сколько секунд считать задержки.')
+
+    def handle(self, *args, **options):
+        metrics = queue.metrics(options['window'])
+        depth = ', '.join(f'{label.lower()}: {metrics["depth"][status]}'
+                          for status, label in Task.STATUSES)
+        self.stdout.write(f'Задачи — {depth}')
+        self.stdout.write(
+            f"Готовы к выполнению: {metrics['ready']}, "
+            f"самая старая ждёт {metrics['lag']:.1f} с")
+        self.stdout.write(
+            f"За {options['window']} с выполнено: {metrics['done']}, "
+            f"среднее ожидание {metrics['wait']:.2f} с, "
+            f"выполнение {metrics['run']:.2f} с")
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='key',
+            field=models.CharField(blank=True, help_text='Ключ идемпотентности: пока задача не завершена, вторая с тем же ключом не ставится.', max_length=200, null=True, unique=True),
+        ),
+    ]
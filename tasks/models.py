@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Отложенный вызов функции, помеченной tasks.queue.task.
+
+    Воркер (manage.py run_tasks) забирает задачи в порядке приоритета и
+    времени запуска; неудачные попытки повторяются с экспоненциальной
+    задержкой, пока не кончится max_attempts.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=200,
+                            help_text='Путь к функции задачи.')
+    args = models.TextField(default='[]', help_text='Аргументы в JSON.')
+    priority = models.SmallIntegerField(
+        default=0, help_text='Задачи с большим приоритетом идут раньше.')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    key = models.CharField(
+        max_length=200, unique=True, null=True, blank=True,
+        help_text='Ключ идемпотентности: пока задача не завершена, '
+                  'вторая с тем же ключом не ставится.')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'],
+                         name='tasks_task_pending'),
+            models.Index(fields=['status', 'finished'],
+                         name='tasks_task_finished'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,200 @@
+"""Очередь фоновых задач в основной базе.
+
+Функция становится задачей декоратором task, а view ставят её вызов в
+очередь через enqueue_on_commit: строка Task появляется только после
+фиксации транзакции, поэтому воркер не увидит ссылок на несохранённые
+объекты. Аргументы хранятся в JSON, поэтому в задачи передаются id, а
+не объекты моделей. Воркер (manage.py run_tasks) забирает задачи
+условным UPDATE по статусу, так что одну задачу не выполнят два
+процесса, а задачи, зависшие в упавшем воркере, возвращает recover.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import (Avg, Count, DurationField, ExpressionWrapper,
+                              F, Min)
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def task(priority=0, max_attempts=3):
+    """Помечает функцию как задачу с приоритетом и числом попыток."""
+    def decorate(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.task_priority = priority
+        func.task_max_attempts = max_attempts
+        return func
+    return decorate
+
+
+def resolve(name):
+    """Функция задачи по имени; произвольные функции не выполняются."""
+    func = import_string(name)
+    if getattr(func, 'task_name', None) != name:
+        raise ValueError(f'{name} не помечена декоратором task')
+    return func
+
+
+def _call_eagerly(func, args):
+    # Как и фоновая задача, ошибка не должна ронять запрос.
+    try:
+        func(*json.loads(json.dumps(args)))
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', func.task_name)
+
+
+def enqueue(func, *args, priority=None, key=None, delay=0):
+    """Ставит вызов func(*args) в очередь и возвращает Task.
+
+    Если задача с тем же key ждёт в очереди или выполняется, новая не
+    создаётся и возвращается существующая. Завершённая задача ключ
+    освобождает, и вызов с ним снова ставится в очередь. При
+    TASKS_EAGER функция выполняется сразу, а строка Task не создаётся.
+    """
+    if settings.TASKS_EAGER:
+        _call_eagerly(func, args)
+        return None
+    fields = {
+        'name': func.task_name,
+        'args': json.dumps(args),
+        'priority': func.task_priority if priority is None else priority,
+        'max_attempts': func.task_max_attempts,
+        'key': key,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    try:
+        with transaction.atomic():
+            return Task.objects.create(**fields)
+    except IntegrityError:
+        if key is None:
+            raise
+        return Task.objects.get(key=key)
+
+
+def enqueue_on_commit(func, *args, **options):
+    """enqueue после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: enqueue(func, *args, **options))
+
+
+def claim(limit):
+    """Помечает до limit готовых задач выполняемыми и возвращает их id."""
+    now = timezone.now()
+    candidates = (Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+                  .order_by('-priority', 'run_at')
+                  .values_list('pk', flat=True)[:limit])
+    claimed = []
+    for pk in list(candidates):
+        # Задачу, которую успел забрать другой воркер, UPDATE не тронет.
+        if Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+                status=Task.RUNNING, started=now,
+                attempts=F('attempts') + 1):
+            claimed.append(pk)
+    return claimed
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: удваивается с каждой ошибкой."""
+    return settings.TASKS_RETRY_BACKOFF * 2 ** (attempts - 1)
+
+
+def _fail(task, error):
+    now = timezone.now()
+    if task.attempts >= task.max_attempts:
+        changes = {'status': Task.FAILED, 'finished': now, 'key': None}
+        logger.error('Задача %s окончательно не выполнена: %s', task, error)
+    else:
+        changes = {'status': Task.QUEUED,
+                   'run_at': now + timedelta(
+                       seconds=retry_delay(task.attempts))}
+        logger.warning('Задача %s будет повторена: %s', task, error)
+    Task.objects.filter(pk=task.pk).update(error=error, **changes)
+
+
+def execute(pk):
+    """Выполняет забранную задачу; True, если она завершилась успешно."""
+    task = Task.objects.get(pk=pk)
+    try:
+        resolve(task.name)(*json.loads(task.args))
+    except Exception:
+        _fail(task, traceback.format_exc())
+        return False
+    Task.objects.filter(pk=pk).update(status=Task.DONE, key=None,
+                                      finished=timezone.now(), error='')
+    return True
+
+
+def execute_in_worker(pk):
+    """Точка входа для процесса пула."""
+    try:
+        return execute(pk)
+    finally:
+        close_old_connections()
+
+
+def recover():
+    """Возвращает в очередь задачи, не завершённые за отведённое время.
+
+    Так обрабатываются задачи воркера, который упал или был убит: это
+    засчитывается как неудачная попытка.
+    """
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASKS_RUNNING_TIMEOUT)
+    stuck = Task.objects.filter(status=Task.RUNNING, started__lt=deadline)
+    for task in stuck:
+        _fail(task, 'Воркер не завершил задачу вовремя')
+    return len(stuck)
+
+
+def purge():
+    """Удаляет выполненные задачи старше TASKS_KEEP_DONE секунд."""
+    before = timezone.now() - timedelta(seconds=settings.TASKS_KEEP_DONE)
+    deleted, _ = Task.objects.filter(status=Task.DONE,
+                                     finished__lt=before).delete()
+    return deleted
+
+
+def _duration(start, end):
+    return Avg(ExpressionWrapper(F(end) - F(start),
+                                 output_field=DurationField()))
+
+
+def _seconds(value):
+    return value.total_seconds() if value is not None else 0.0
+
+
+def metrics(window=3600):
+    """Глубина очереди и задержки выполнения.
+
+    depth — число задач по статусам, ready — сколько задач уже можно
+    выполнять, lag — сколько секунд ждёт самая старая из них; wait и
+    run — среднее ожидание в очереди и время выполнения задач,
+    завершённых за последние window секунд, done — их число.
+    """
+    now = timezone.now()
+    depth = dict.fromkeys(dict(Task.STATUSES), 0)
+    depth.update(Task.objects.order_by().values_list('status')
+                 .annotate(Count('pk')))
+    ready = (Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+             .aggregate(count=Count('pk'), oldest=Min('run_at')))
+    recent = (Task.objects
+              .filter(status=Task.DONE,
+                      finished__gte=now - timedelta(seconds=window))
+              .aggregate(done=Count('pk'),
+                         wait=_duration('run_at', 'started'),
+                         run=_duration('started', 'finished')))
+    return {
+        'depth': depth,
+        'ready': ready['count'],
+        'lag': _seconds(now - ready['oldest'] if ready['oldest'] else None),
+        'done': recent['done'],
+        'wait': _seconds(recent['wait']),
+        'run': _seconds(recent['run']),
+    }
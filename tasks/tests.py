@@ -0,0 +1,172 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Task
+
+calls = []
+
+
+@queue.task()
+def remember(value):
+    calls.append(value)
+
+
+@queue.task(priority=5)
+def urgent(value):
+    calls.append(value)
+
+
+@queue.task(max_attempts=2)
+def explode():
+    raise RuntimeError('сбой')
+
+
+def unmarked():
+    calls.append('unmarked')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_BACKOFF=10)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_all(self):
+        while True:
+            claimed = queue.claim(10)
+            if not claimed:
+                return
+            for pk in claimed:
+                queue.execute(pk)
+
+    def test_enqueue_stores_call(self):
+        """Вызов сохраняется в очереди и выполняется воркером"""
+        task = queue.enqueue(remember, 'привет')
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(calls, [])
+        self.run_all()
+        self.assertEqual(calls, ['привет'])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 1)
+        self.assertIsNotNone(task.finished)
+
+    def test_idempotency_key(self):
+        """Незавершённая задача с тем же ключом не дублируется"""
+        first = queue.enqueue(remember, 1, key='once')
+        second = queue.enqueue(remember, 2, key='once')
+        self.assertEqual(first.pk, second.pk)
+        self.run_all()
+        queue.enqueue(remember, 3, key='once')
+        self.run_all()
+        self.assertEqual(calls, [1, 3])
+
+    def test_failed_task_releases_key(self):
+        """Окончательно упавшая задача не блокирует свой ключ"""
+        task = queue.enqueue(explode, key='retry')
+        Task.objects.filter(pk=task.pk).update(attempts=1)
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            queue.execute(queue.claim(1)[0])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertIsNone(task.key)
+        self.assertNotEqual(queue.enqueue(explode, key='retry').pk, task.pk)
+
+    def test_priority_and_delay(self):
+        """Сначала выполняются приоритетные задачи, отложенные ждут"""
+        queue.enqueue(remember, 'обычная')
+        queue.enqueue(urgent, 'срочная')
+        queue.enqueue(urgent, 'позже', delay=60)
+        self.run_all()
+        self.assertEqual(calls, ['срочная', 'обычная'])
+
+    def test_claim_is_exclusive(self):
+        """Забранную задачу не получит другой воркер"""
+        queue.enqueue(remember, 1)
+        self.assertEqual(len(queue.claim(5)), 1)
+        self.assertEqual(queue.claim(5), [])
+
+    def test_failure_is_retried_with_backoff(self):
+        """Ошибка откладывает задачу, а после всех попыток она failed"""
+        task = queue.enqueue(explode)
+        before = timezone.now()
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.assertFalse(queue.execute(queue.claim(1)[0]))
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertIn('RuntimeError', task.error)
+        self.assertGreaterEqual(task.run_at, before + timedelta(seconds=10))
+        self.assertEqual(queue.claim(1), [])
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            self.assertFalse(queue.execute(queue.claim(1)[0]))
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    def test_unmarked_function_is_not_executed(self):
+        """Воркер выполняет только функции, помеченные task"""
+        task = Task.objects.create(name='tasks.tests.unmarked')
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.run_all()
+        task.refresh_from_db()
+        self.assertEqual(calls, [])
+        self.assertIn('не помечена', task.error)
+
+    @override_settings(TASKS_RUNNING_TIMEOUT=60)
+    def test_recover_requeues_stuck_tasks(self):
+        """Задача упавшего воркера возвращается в очередь"""
+        task = queue.enqueue(remember, 1)
+        queue.claim(1)
+        self.assertEqual(queue.recover(), 0)
+        Task.objects.filter(pk=task.pk).update(
+            started=timezone.now() - timedelta(minutes=5))
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.assertEqual(queue.recover(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+
+    def test_metrics(self):
+        """Метрики показывают глубину очереди и задержки"""
+        now = timezone.now()
+        Task.objects.create(name='x', run_at=now - timedelta(seconds=30))
+        Task.objects.create(name='x', run_at=now + timedelta(seconds=30))
+        Task.objects.create(name='x', status=Task.DONE,
+                            run_at=now - timedelta(seconds=4),
+                            started=now - timedelta(seconds=1),
+                            finished=now)
+        metrics = queue.metrics()
+        self.assertEqual(metrics['depth'], {'queued': 2, 'running': 0,
+                                            'done': 1, 'failed': 0})
+        self.assertEqual(metrics['ready'], 1)
+        self.assertGreaterEqual(metrics['lag'], 30)
+        self.assertEqual(metrics['done'], 1)
+        self.assertAlmostEqual(metrics['wait'], 3, places=3)
+        self.assertAlmostEqual(metrics['run'], 1, places=3)
+
+    def test_worker_command(self):
+        """run_tasks --burst выполняет очередь и завершается"""
+        queue.enqueue(remember, 1)
+        queue.enqueue(explode)
+        out = StringIO()
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            call_command('run_tasks', workers=0, burst=True, stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn('Выполнено задач: 1, с ошибкой: 1', out.getvalue())
+        out = StringIO()
+        call_command('task_stats', stdout=out)
+        self.assertIn('в очереди: 1', out.getvalue())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode(self):
+        """В режиме TASKS_EAGER задача выполняется сразу"""
+        self.assertIsNone(queue.enqueue(remember, 1))
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            queue.enqueue(explode)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
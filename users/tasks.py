@@ -0,0 +1,19 @@
+"""Фоновые задачи пользователей (см. tasks.queue)."""
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+
+from tasks.queue import task
+
+User = get_user_model()
+
+
+@task(priority=5)
+def send_welcome_email(user_id):
+    """Письмо с приветствием после регистрации."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.email:
+        return
+    send_mail('Добро пожаловать в Yatube',
+              f'{user.first_name or user.username}, вы зарегистрировались '
+              f'в Yatube под именем {user.username}.',
+              None, [user.email])
@@ -1,3 +1,22 @@
-from django.test import TestCase
+from django.core import mail
+from django.test import TransactionTestCase
+from django.urls import reverse
 
-# Create your tests here.
+from posts.models import User
+
+
+class SignUpEmailTest(TransactionTestCase):
+    def test_signup_sends_welcome_email(self):
+        """После регистрации уходит приветственное письмо"""
+        self.client.post(reverse('signup'), {
+            'first_name': 'Павел',
+            'last_name': 'Иванов',
+            'username': 'pavel',
+            'email': 'pavel@example.com',
+            'password1': 'Sup3r-secret!',
+            'password2': 'Sup3r-secret!',
+        })
+        self.assertTrue(User.objects.filter(username='pavel').exists())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['pavel@example.com'])
+        self.assertIn('Павел', mail.outbox[0].body)
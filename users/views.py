@@ -1,12 +1,24 @@
 from django.contrib.auth import views
 from django.shortcuts import render
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 
+from posts.ratelimit import ratelimit
+from tasks.queue import enqueue_on_commit
+
 from .forms import CreationForm
+from .tasks import send_welcome_email
 
 
+@method_decorator(ratelimit('signup', by='ip'), name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('signup')
     template_name = 'signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        enqueue_on_commit(send_welcome_email, self.object.pk,
+                          key=f'welcome:{self.object.pk}')
+        return response
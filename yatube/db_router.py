@@ -0,0 +1,123 @@
+"""Маршрутизация запросов между основной базой и репликами для чтения.
+
+Запись всегда идёт в default, чтение — в одну из реплик из
+settings.DATABASE_REPLICAS. Чтобы пользователь сразу видел свои
+изменения, после записи поток закрепляется за основной базой: до конца
+запроса или команды, а ReplicaPinningMiddleware продлевает закрепление
+на REPLICA_PIN_SECONDS кукой, общей для всех воркеров. Внутри
+транзакции чтение тоже идёт в default. Реплика, к которой не удалось
+подключиться, пропускается REPLICA_RETRY_SECONDS секунд; если доступных
+реплик нет, чтение уходит в основную базу.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = 'db_primary'
+# Служебные таблицы, которые читаются сразу после записи в любом запросе:
+# сессии, хранилище ключей миниатюр sorl-thumbnail и очередь задач. Их
+# чтение всегда идёт в default, а запись не закрепляет пользователя за
+# основной базой.
+PRIMARY_APPS = {'sessions', 'thumbnail', 'tasks'}
+
+_state = threading.local()
+# alias реплики -> время, до которого она считается недоступной.
+_unavailable = {}
+
+
+def pin():
+    """Закрепляет текущий поток за основной базой после записи."""
+    _state.pinned = True
+    _state.wrote = True
+
+
+def reset(pinned=False):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+@contextmanager
+def primary():
+    """Читает из основной базы внутри блока, не считая это записью."""
+    pinned = is_pinned()
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = pinned
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def wrote():
+    return getattr(_state, 'wrote', False)
+
+
+def _available(alias):
+    retry_at = _unavailable.get(alias)
+    if retry_at is not None and retry_at > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unavailable[alias] = (time.monotonic() +
+                               settings.REPLICA_RETRY_SECONDS)
+        return False
+    _unavailable.pop(alias, None)
+    return True
+
+
+def read_alias():
+    """Куда отправить чтение: реплика или default."""
+    replicas = settings.DATABASE_REPLICAS
+    if (not replicas or is_pinned() or
+            connections[DEFAULT_DB_ALIAS].in_atomic_block):
+        return DEFAULT_DB_ALIAS
+    for alias in random.sample(replicas, len(replicas)):
+        if _available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_APPS:
+            pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них можно связывать.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет за основной базой запросы в окне после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset(pinned=PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and wrote():
+                response.set_cookie(PIN_COOKIE, '1',
+                                    max_age=settings.REPLICA_PIN_SECONDS,
+                                    httponly=True)
+        finally:
+            reset()
+        return response
@@ -17,6 +17,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'users',
     'posts',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -28,7 +29,9 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'posts.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.db_router.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,6 +70,48 @@ DATABASES = {
     }
 }
 
+# Профиль для нескольких воркеров (YATUBE_SQLITE_PRODUCTION=1): WAL,
+# PRAGMA и повторы заблокированных записей (yatube.sqlite_backend),
+# а соединения живут между запросами CONN_MAX_AGE секунд.
+SQLITE_PRODUCTION = os.environ.get('YATUBE_SQLITE_PRODUCTION') == '1'
+if SQLITE_PRODUCTION:
+    DATABASES['default'].update({
+        'ENGINE': 'yatube.sqlite_backend',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                # Отрицательное значение — размер в КиБ, здесь 64 МиБ.
+                'cache_size': -64 * 1024,
+                'busy_timeout': 5000,
+            },
+            'immediate_transactions': True,
+            'lock_retries': 5,
+            'lock_backoff': 0.05,
+        },
+    })
+
+# Реплики для чтения: пути к копиям базы через запятую в
+# YATUBE_DB_REPLICAS. Они открываются только на чтение, а в тестах
+# указывают на тестовую базу default.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')),
+        start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{path}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['yatube.db_router.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы и
+# сколько пропускается реплика, к которой не удалось подключиться.
+REPLICA_PIN_SECONDS = 5
+REPLICA_RETRY_SECONDS = 30
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,6 +155,106 @@ LOGIN_REDIRECT_URL = "index"
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Общий для всех воркеров кэш: версии страниц и счётчики должны
+# совпадать во всех процессах. Настройки для тестов — в
+# yatube.settings_test.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', }}
+        'BACKEND': 'yatube.sqlite_cache.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+# Авторы с таким числом подписчиков не раскладываются по лентам
+# при публикации: их записи подтягиваются в ленту при чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+# Доля обращений к кэшу страниц, которые попадают в статистику
+# page_cache_stats (0 — не считать вовсе).
+PAGE_CACHE_STATS_SAMPLE_RATE = 0.01
+
+# Максимальное число SQL-запросов на один запрос к view (по имени URL)
+# для страниц с текстовыми карточками: на один-два больше замеренного
+# на полной странице, включая первый заход, который создаёт строку
+# AuthorStats. Карточка с изображением при холодном кэше добавляет
+# до двух обращений sorl-thumbnail к хранилищу ключей (исходный формат и
+# WebP), они учитываются отдельно, см. posts.tests.test_query_budget.
+# При QUERY_BUDGET_STRICT превышение бюджета роняет запрос (так
+# работают тесты), иначе в DEBUG пишется в лог.
+QUERY_BUDGETS = {
+    'index': 7,
+    'group': 8,
+    'profile': 12,
+    'post': 10,
+    'post_comments': 5,
+    'follow_index': 7,
+    'api_posts': 4,
+    'api_post': 4,
+    'api_post_comments': 5,
+    'api_group_posts': 5,
+    'api_profile': 5,
+    'api_profile_posts': 5,
+    'api_follow': 6,
+}
+QUERY_BUDGET_STRICT = False
+
+# Ограничение частоты запросов к пишущим view (posts.ratelimit):
+# «N/период» — не больше N запросов за период, из них до N подряд.
+RATE_LIMIT_ENABLED = True
+RATE_LIMITS = {
+    'new_post': '10/m',
+    'add_comment': '20/m',
+    'profile_follow': '30/m',
+    'signup': '5/h',
+}
+
+# Миниатюры готовятся в очереди задач после сохранения записи; шаблон
+# генерирует их сам только в режиме разработки.
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+THUMBNAIL_GENERATE_INLINE = DEBUG
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+
+# Очередь фоновых задач (tasks): письма, миниатюры и другая работа,
+# которой не место внутри запроса, выполняется воркером
+# manage.py run_tasks. TASKS_EAGER выполняет задачи сразу при постановке.
+TASKS_EAGER = False
+TASKS_WORKERS = 2
+TASKS_POLL_INTERVAL = 1
+# Задержка перед второй попыткой, дальше она удваивается.
+TASKS_RETRY_BACKOFF = 10
+# Задача, не завершённая за это время, считается брошенной воркером.
+TASKS_RUNNING_TIMEOUT = 600
+# Сколько хранить выполненные задачи (и их ключи идемпотентности).
+TASKS_KEEP_DONE = 7 * 24 * 3600
+
+# Загрузки больше мегабайта Django сразу пишет во временный файл.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+
+# Число записей для нумерованных страниц (posts.counts) кэшируется на
+# COUNT_CACHE_TTL секунд и затем пересчитывается в фоне.
+COUNT_CACHE_TTL = 60
+COUNT_REFRESH_ASYNC = True
+
+# Ограничения и параметры нормализации изображений записей
+# (posts.images): файлы больше лимитов отклоняются формой, остальные
+# уменьшаются до IMAGE_MAX_DIMENSION по длинной стороне.
+IMAGE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50_000_000
+IMAGE_MAX_DIMENSION = 2048
+IMAGE_JPEG_QUALITY = 85
+IMAGE_WEBP_QUALITY = 80
+
+# Сколько хранится отрендеренная карточка записи (posts.templatetags.
+# post_cards). Ключ меняется при правке записи и новых комментариях,
+# а переименование группы или автора доходит до карточек за это время.
+POST_CARD_TIMEOUT = 60 * 60
+
+# Сколько хранятся в кэше счётчики автора (posts.stats). Сигналы
+# сбрасывают их при каждом изменении, срок страхует от пропущенных.
+AUTHOR_STATS_TIMEOUT = 60 * 60
@@ -0,0 +1,31 @@
+"""Настройки для тестов: production-настройки с тестовыми отличиями.
+
+manage.py test и pytest подключают этот модуль сами. Тесты, которые
+проверяют production-поведение (очередь задач, ограничение частоты,
+общий кэш), включают его через override_settings.
+"""
+from .settings import *  # noqa: F401,F403
+
+# Тесты не пересекаются с кэшем запущенного сервера.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', }}
+
+# Каждое обращение к кэшу страниц попадает в статистику.
+PAGE_CACHE_STATS_SAMPLE_RATE = 1
+
+# Превышение бюджета запросов роняет тест.
+QUERY_BUDGET_STRICT = True
+
+# Повторные POST не упираются в лимит.
+RATE_LIMIT_ENABLED = False
+
+# Задачи выполняются сразу при постановке, миниатюры — в той же задаче.
+TASKS_EAGER = True
+THUMBNAIL_ASYNC = False
+THUMBNAIL_GENERATE_INLINE = False
+
+# Число записей пересчитывается сразу, чтобы не зависеть от предыдущих
+# тестов.
+COUNT_CACHE_TTL = 0
+COUNT_REFRESH_ASYNC = False
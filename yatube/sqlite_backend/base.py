@@ -0,0 +1,81 @@
+"""SQLite для нескольких воркеров: PRAGMA, BEGIN IMMEDIATE и повторы.
+
+Подключается как ENGINE 'yatube.sqlite_backend'. Дополнительные ключи
+OPTIONS:
+
+* pragmas — PRAGMA, выполняемые при открытии соединения (WAL,
+  synchronous, mmap_size, cache_size, busy_timeout);
+* immediate_transactions — начинать транзакции с BEGIN IMMEDIATE: блокировка
+  на запись берётся сразу и ждёт busy_timeout, а не падает с «database is
+  locked» при попытке повысить блокировку чтения посреди транзакции;
+* lock_retries, lock_backoff — сколько раз и с какой начальной паузой
+  (удваивается, со случайным разбросом) повторять запрос, упёршийся в
+  блокировку. Повторяются только запросы вне транзакции и сам BEGIN:
+  внутри транзакции повтор одного запроса не имеет смысла.
+"""
+import logging
+import random
+import time
+
+from django.db.backends.sqlite3 import base
+
+logger = logging.getLogger(__name__)
+
+LOCKED_ERRORS = ('database is locked', 'database table is locked')
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    retries = 0
+    backoff = 0.05
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(super().executemany, query, param_list)
+
+    def _retry(self, method, *args):
+        attempt = 0
+        while True:
+            in_transaction = self.connection.in_transaction
+            try:
+                return method(*args)
+            except base.Database.OperationalError as error:
+                if (in_transaction or attempt >= self.retries or
+                        not str(error).startswith(LOCKED_ERRORS)):
+                    raise
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            attempt += 1
+            logger.warning('База заблокирована, повтор %d через %.2f с',
+                           attempt, delay)
+            time.sleep(delay)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.immediate_transactions = params.pop('immediate_transactions',
+                                                 False)
+        self.lock_retries = params.pop('lock_retries', 0)
+        self.lock_backoff = params.pop('lock_backoff',
+                                       RetryingCursorWrapper.backoff)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=RetryingCursorWrapper)
+        cursor.retries = self.lock_retries
+        cursor.backoff = self.lock_backoff
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        if self.immediate_transactions:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,299 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+
+from posts import cache as page_cache
+from posts import ratelimit
+from posts.models import Group
+from yatube import db_router
+from yatube import settings as production_settings
+from yatube.sqlite_backend.base import DatabaseWrapper
+from yatube.sqlite_cache import SQLiteCache
+
+INCREMENTS_PER_WORKER = 200
+WORKERS = 4
+
+
+def increment_many(location):
+    cache = SQLiteCache(location, {})
+    for _ in range(INCREMENTS_PER_WORKER):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_set_get_delete(self):
+        """Значения любых типов сохраняются и удаляются"""
+        values = {'int': 1, 'str': 'строка', 'dict': {'a': [1, 2]},
+                  'bool': True}
+        for key, value in values.items():
+            with self.subTest(key=key):
+                self.cache.set(key, value)
+                self.assertEqual(self.cache.get(key), value)
+                self.assertIs(type(self.cache.get(key)), type(value))
+        self.assertTrue(self.cache.delete('int'))
+        self.assertIsNone(self.cache.get('int'))
+
+    def test_integers_outside_64_bits_are_pickled(self):
+        """Целые вне диапазона INTEGER сохраняются без OverflowError"""
+        for value in (2 ** 63 - 1, 2 ** 63, -2 ** 63, -2 ** 63 - 1, 10 ** 30):
+            with self.subTest(value=value):
+                self.cache.set('big', value)
+                self.assertEqual(self.cache.get('big'), value)
+                self.assertTrue(self.cache.add(f'added{value}', value))
+                self.assertEqual(self.cache.get(f'added{value}'), value)
+
+    def test_add_respects_existing_and_expired_keys(self):
+        """add не перезаписывает живой ключ, но занимает истёкший"""
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+        self.cache.set('expiring', 1, timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('expiring', None))
+        self.assertTrue(self.cache.add('expiring', 2))
+        self.assertEqual(self.cache.get('expiring'), 2)
+
+    def test_incr_missing_key_raises(self):
+        """incr отсутствующего ключа вызывает ValueError"""
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_is_atomic_across_processes(self):
+        """Параллельные incr из разных процессов не теряют обновлений"""
+        self.cache.set('counter', 0, None)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=increment_many,
+                                   args=(self.location,))
+                   for _ in range(WORKERS)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'),
+                         WORKERS * INCREMENTS_PER_WORKER)
+
+    def test_cull_evicts_least_recently_used(self):
+        """При переполнении вытесняются давно не читавшиеся ключи"""
+        for number in range(10):
+            self.cache.set(f'key{number}', number)
+        self.cache._connection.execute(
+            "UPDATE cache SET accessed = 0 WHERE key LIKE '%key0'")
+        self.cache.set('key10', 10)
+        self.cache._cull()
+        self.assertIsNone(self.cache.get('key0'))
+        self.assertEqual(self.cache.get('key10'), 10)
+
+    def test_incr_counts_as_access(self):
+        """Изменяемый incr счётчик не вытесняется как давно не читавшийся"""
+        for number in range(10):
+            self.cache.set(f'key{number}', number)
+        self.cache._connection.execute('UPDATE cache SET accessed = 0')
+        self.cache.incr('key0')
+        self.cache.set('key10', 10)
+        self.cache._cull()
+        self.assertEqual(self.cache.get('key0'), 1)
+
+
+class SQLiteCacheBackendTest(TestCase):
+    """Счётчики приложения через incr и add на SQLiteCache."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        settings = override_settings(CACHES={'default': {
+            'BACKEND': 'yatube.sqlite_cache.SQLiteCache',
+            'LOCATION': os.path.join(self.directory, 'cache.sqlite3')}})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_version_bump(self):
+        """Версии областей создаются add и растут через incr"""
+        version = page_cache.get_version('scope')
+        page_cache.bump('scope')
+        self.assertEqual(page_cache.get_version('scope'), version + 1)
+        self.assertEqual(page_cache.get_versions(['scope', 'other'])[0],
+                         version + 1)
+
+    def test_rate_limit_bucket(self):
+        """Корзина ограничения частоты работает на incr, decr и touch"""
+        self.assertEqual(ratelimit.hit('test', 'client', '1/m'), 0)
+        self.assertGreater(ratelimit.hit('test', 'client', '1/m'), 0)
+
+    @override_settings(RATE_LIMITS={'test': '1/m'})
+    def test_throttled_counter(self):
+        """Счётчик отклонённых запросов создаётся add и растёт incr"""
+        for _ in range(3):
+            ratelimit.hit('test', 'client', '1/m')
+        self.assertEqual(ratelimit.stats(), {'test': 2})
+
+
+class ProductionSettingsTest(SimpleTestCase):
+    """Тестовые отличия живут только в yatube.settings_test."""
+
+    def test_production_paths_are_enabled(self):
+        """Production-настройки включают общий кэш, очередь и лимиты"""
+        self.assertEqual(production_settings.CACHES['default']['BACKEND'],
+                         'yatube.sqlite_cache.SQLiteCache')
+        self.assertTrue(production_settings.RATE_LIMIT_ENABLED)
+        self.assertFalse(production_settings.TASKS_EAGER)
+        self.assertTrue(production_settings.THUMBNAIL_ASYNC)
+        self.assertTrue(production_settings.COUNT_REFRESH_ASYNC)
+        self.assertFalse(production_settings.QUERY_BUDGET_STRICT)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        Group.objects.create(title='Первая', slug='first')
+        # Реплика — снимок тестовой базы в файле, открытый только на чтение.
+        path = os.path.join(self.directory, 'replica.sqlite3')
+        connection.ensure_connection()
+        with sqlite3.connect(path) as target:
+            connection.connection.backup(target)
+        self.add_replica(f'file:{path}?mode=ro')
+        Group.objects.create(title='Вторая', slug='second')
+        db_router.reset()
+
+    def tearDown(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        db_router._unavailable.clear()
+        db_router.reset()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def add_replica(self, name):
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}
+
+    def test_reads_go_to_replica(self):
+        """Чтение идёт в реплику, запись — в основную базу"""
+        self.assertEqual(Group.objects.all().db, 'replica')
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Group.objects.using(DEFAULT_DB_ALIAS).count(), 2)
+
+    def test_write_pins_to_primary(self):
+        """После записи поток читает из основной базы"""
+        Group.objects.filter(slug='first').update(title='Новая')
+        self.assertEqual(Group.objects.all().db, DEFAULT_DB_ALIAS)
+        self.assertEqual(Group.objects.count(), 2)
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        """Недоступная реплика пропускается"""
+        connections['replica'].close()
+        del connections['replica']
+        self.add_replica(
+            f'file:{os.path.join(self.directory, "missing")}?mode=ro')
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertIn('replica', db_router._unavailable)
+
+    def test_page_cache_is_filled_from_primary(self):
+        """Страница для кэша строится по основной базе, а не по реплике"""
+        @page_cache.anonymous_page_cache('groups')
+        def groups(request):
+            return HttpResponse(str(Group.objects.count()))
+
+        cache.clear()
+        request = RequestFactory().get('/groups/')
+        request.user = AnonymousUser()
+        self.assertEqual(groups(request).content, b'2')
+        self.assertFalse(db_router.is_pinned())
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_middleware_pins_after_write(self):
+        """После записи кука закрепляет пользователя за основной базой"""
+        def write(request):
+            Group.objects.create(title='Третья', slug='third')
+            return HttpResponse()
+
+        def read(request):
+            return HttpResponse(db_router.read_alias())
+
+        factory = RequestFactory()
+        response = db_router.ReplicaPinningMiddleware(write)(
+            factory.post('/'))
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+        reader = db_router.ReplicaPinningMiddleware(read)
+        self.assertEqual(reader(factory.get('/')).content, b'replica')
+        factory.cookies[db_router.PIN_COOKIE] = '1'
+        self.assertEqual(reader(factory.get('/')).content,
+                         DEFAULT_DB_ALIAS.encode())
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+        self.wrapper = DatabaseWrapper({
+            'ENGINE': 'yatube.sqlite_backend', 'NAME': self.path,
+            'OPTIONS': {
+                'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                            'busy_timeout': 10},
+                'immediate_transactions': True,
+                'lock_retries': 8, 'lock_backoff': 0.02,
+            },
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0, 'TIME_ZONE': None, 'TEST': {},
+        }, 'production')
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (value INTEGER)')
+
+    def tearDown(self):
+        self.wrapper.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_pragmas_applied_on_connect(self):
+        """PRAGMA из OPTIONS выполняются при открытии соединения"""
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_locked_write_is_retried(self):
+        """Запись, упёршаяся в чужую блокировку, повторяется с паузой"""
+        other = sqlite3.connect(self.path, isolation_level=None,
+                                check_same_thread=False)
+        other.execute('BEGIN IMMEDIATE')
+        releaser = threading.Timer(0.1, other.execute, ['COMMIT'])
+        releaser.start()
+        with self.assertLogs('yatube.sqlite_backend.base', 'WARNING'):
+            with self.wrapper.cursor() as cursor:
+                cursor.execute('INSERT INTO item VALUES (%s)', [1])
+        releaser.join()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        other.close()
+
+    def test_transactions_begin_immediate(self):
+        """Транзакция сразу берёт блокировку на запись"""
+        self.wrapper.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True)
+        other = sqlite3.connect(self.path, timeout=0)
+        with self.assertRaises(sqlite3.OperationalError):
+            other.execute('BEGIN IMMEDIATE')
+        other.close()
+        self.wrapper.rollback()
+        self.wrapper.set_autocommit(True)